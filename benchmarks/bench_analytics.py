@@ -0,0 +1,109 @@
+"""Per-subject grade statistics: paging every score through /api/scores/list and
+computing them on the client vs. one call to /api/scores/analytics.
+
+Run from the repository root:
+    python benchmarks/bench_analytics.py [rows]
+"""
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(WORK_DIR, 'bench_analytics.db')}"
+os.environ["CACHE_VERSION_FILE"] = os.path.join(WORK_DIR, "cache_versions")
+os.environ["DB_AUTO_MIGRATE"] = "True"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-with-enough-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+from sqlalchemy import insert
+from main import app
+from database.database import AsyncSessionLocal
+from auth.security_context import get_security_context
+from cache.response_cache import response_cache
+from score.score_aggregate_repository import ScoreAggregateRepository
+from student.student_model import Student
+from subject.subject_model import Subject
+from score.score_model import Score
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+STUDENTS = 2000
+SUBJECTS = 10
+PAGE_SIZE = 1000
+
+async def seed():
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Student), [
+            {"student_id": i, "name": f"student {i}", "birthdate": datetime.date(2005, 1, 1), "class_": f"C{i % 20}"}
+            for i in range(1, STUDENTS + 1)
+        ])
+        await db.execute(insert(Subject), [{"subject_id": i, "name": f"subject {i}", "amount": 3} for i in range(1, SUBJECTS + 1)])
+        await db.execute(insert(Score), [
+            {
+                "score_id": i,
+                "student_id": i % STUDENTS + 1,
+                "subject_id": i % SUBJECTS + 1,
+                "score": (i * 7919 % 1000) / 100,
+                "date": datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 300),
+            }
+            for i in range(1, ROWS + 1)
+        ])
+        await ScoreAggregateRepository(db).rebuild()
+        await db.commit()
+
+async def client_side(client, headers):
+    # What grade reports do today: page through every score, then compute.
+    transferred = 0
+    by_subject = defaultdict(list)
+    after = None
+    while True:
+        params = {"limit": PAGE_SIZE} if after is None else {"limit": PAGE_SIZE, "after": after}
+        response = await client.get("/api/scores/list", params=params, headers=headers)
+        transferred += len(response.content)
+        page = response.json()
+        for score in page["data"]:
+            by_subject[score["subject_id"]].append(score["score"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+    report = {}
+    for subject_id, values in by_subject.items():
+        report[subject_id] = {
+            "mean": statistics.fmean(values),
+            "stddev": statistics.pstdev(values),
+            "percentiles": statistics.quantiles(values, n=4, method="inclusive"),
+            "histogram": [sum(1 for value in values if low <= value < low + 1) for low in range(10)],
+        }
+    return transferred, report
+
+async def server_side(client, headers):
+    response = await client.get("/api/scores/analytics", params={"group_by": "subject", "percentiles": "25,50,75"}, headers=headers)
+    return len(response.content), response.json()["data"]
+
+async def measure(name, path, client, headers):
+    response_cache.clear()
+    start = time.perf_counter()
+    transferred, _ = await path(client, headers)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} {elapsed:8.3f} s {transferred / 1024:12.1f} KiB transferred")
+
+async def main():
+    async with app.router.lifespan_context(app):
+        await seed()
+        token = get_security_context().encode_token({
+            "sub": "bench", "role": "admin",
+            "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=30),
+        })
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            await measure("client side (/list + statistics)", client_side, client, headers)
+            await measure("server side (/analytics)", server_side, client, headers)
+
+if __name__ == "__main__":
+    asyncio.run(main())
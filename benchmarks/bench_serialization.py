@@ -0,0 +1,89 @@
+"""Serializing a large score list: ORM entities + model_validate + jsonable_encoder
+vs. column rows dumped by a TypeAdapter.
+
+Run from the repository root:
+    python benchmarks/bench_serialization.py [rows]
+"""
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+from database.database import AsyncSessionLocal, engine
+from database.database_migrations import run_migrations
+from student.student_model import Student
+from subject.subject_model import Subject
+from score.score_model import Score
+from score.score_repository import ScoreRepository
+from score.score_schema import ScoreSchema, score_rows_adapter
+from common.serialization import data_response
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+STUDENTS = 1000
+SUBJECTS = 10
+
+async def seed():
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Student), [
+            {"student_id": i, "name": f"student {i}", "birthdate": datetime.date(2005, 1, 1), "class_": f"C{i % 20}"}
+            for i in range(1, STUDENTS + 1)
+        ])
+        await conn.execute(insert(Subject), [
+            {"subject_id": i, "name": f"subject {i}", "amount": 3} for i in range(1, SUBJECTS + 1)
+        ])
+        await conn.execute(insert(Score), [
+            {
+                "score_id": i,
+                "student_id": i % STUDENTS + 1,
+                "subject_id": i % SUBJECTS + 1,
+                "score": float(i % 11),
+                "date": datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 300),
+            }
+            for i in range(1, ROWS + 1)
+        ])
+
+async def entity_path():
+    # What the list endpoints did before: load entities, validate each one, encode.
+    async with AsyncSessionLocal() as db:
+        scores = (await db.execute(select(Score).order_by(Score.score_id))).scalars().all()
+        result = [ScoreSchema.model_validate(score) for score in scores]
+        return JSONResponse(content={"data": jsonable_encoder(result)}, status_code=200)
+
+async def row_path():
+    async with AsyncSessionLocal() as db:
+        scores = await ScoreRepository(db).get_page(ROWS)
+        return data_response(score_rows_adapter, scores)
+
+async def measure(name, path):
+    start = time.perf_counter()
+    response = await path()
+    elapsed = time.perf_counter() - start
+    # Separate run: tracemalloc slows allocation-heavy code down too much to time it.
+    tracemalloc.start()
+    await path()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} {elapsed:8.3f} s {ROWS / elapsed:12.0f} rows/s {peak / 2**20:9.1f} MiB peak {len(response.body) / 2**20:7.1f} MiB body")
+
+async def main():
+    await seed()
+    # Warm up both paths (statement compilation, adapters) before measuring.
+    await entity_path()
+    await row_path()
+    await measure("entities + jsonable_encoder", entity_path)
+    await measure("rows + TypeAdapter", row_path)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,225 @@
+"""Load test: seeds a throwaway SQLite database, then drives the real app in
+process through an ASGI client with a fixed number of concurrent clients and
+reports throughput and latency percentiles per endpoint.
+
+Results are written as JSON. Pass a previous result as --baseline to flag
+endpoints whose p95 latency or throughput regressed by more than --threshold
+(the exit status is 1 when any did).
+
+Run from the repository root:
+    python benchmarks/load_test.py --scores 100000 --concurrency 32 --output results.json
+    python benchmarks/load_test.py --baseline results.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+WORK_DIR = tempfile.mkdtemp()
+# LOAD_TEST_DATABASE_URL runs against another (empty) database, e.g. MariaDB.
+os.environ["DATABASE_URL"] = os.getenv("LOAD_TEST_DATABASE_URL") or f"sqlite+aiosqlite:///{os.path.join(WORK_DIR, 'load_test.db')}"
+os.environ["CACHE_VERSION_FILE"] = os.path.join(WORK_DIR, "cache_versions")
+os.environ["DB_AUTO_MIGRATE"] = "True"
+os.environ.setdefault("SECRET_KEY", "load-test-secret-key-with-enough-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+# Under load most requests would cross the slow-request threshold and log their SQL.
+os.environ.setdefault("SLOW_REQUEST_MS", "60000")
+
+import httpx
+from sqlalchemy import insert
+from main import app
+from database.database import AsyncSessionLocal, engine
+from auth.security_context import get_security_context
+from cache.response_cache import response_cache
+from score.score_aggregate_repository import ScoreAggregateRepository
+from student.student_model import Student
+from subject.subject_model import Subject
+from score.score_model import Score
+from user.user_model import User
+
+USERNAME = "load-test"
+PASSWORD = "load-test-password"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--scores", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--signin-requests", type=int, default=50, help="requests for signin, which is bcrypt-bound")
+    parser.add_argument("--endpoints", default="list,avg,avg_all,top,signin,add", help="comma-separated, run in this order")
+    parser.add_argument("--cold", action="store_true", help="clear the response cache before every request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    return parser.parse_args()
+
+async def seed(args):
+    hashed = await get_security_context().password_hasher.hash(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), [{"username": USERNAME, "password": hashed, "role": "admin"}])
+        await db.execute(insert(Student), [
+            {"student_id": i, "name": f"student {i}", "birthdate": datetime.date(2005, 1, 1), "class_": f"C{i % 40}"}
+            for i in range(1, args.students + 1)
+        ])
+        await db.execute(insert(Subject), [{"subject_id": i, "name": f"subject {i}", "amount": 3} for i in range(1, args.subjects + 1)])
+        for start in range(1, args.scores + 1, 10000):
+            await db.execute(insert(Score), [
+                {
+                    "score_id": i,
+                    "student_id": i % args.students + 1,
+                    "subject_id": i % args.subjects + 1,
+                    "score": (i * 7919 % 1000) / 100,
+                    "date": datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 300),
+                }
+                for i in range(start, min(start + 10000, args.scores + 1))
+            ])
+        await ScoreAggregateRepository(db).rebuild()
+        await db.commit()
+
+def endpoint_requests(args, rng: random.Random):
+    """name -> function(i) returning (method, path, json body) for request i."""
+    next_score_id = args.scores
+    def add(i):
+        # Explicit ids, past the seeded ones, so every add inserts a new row.
+        return "POST", "/api/scores/add", {
+            "score_id": next_score_id + i + 1,
+            "student_id": rng.randint(1, args.students),
+            "subject_id": rng.randint(1, args.subjects),
+            "score": rng.randint(0, 10),
+            "date": "2024-06-01",
+        }
+    return {
+        "list": lambda i: ("GET", f"/api/scores/list?limit=100&after={rng.randrange(max(args.scores - 100, 1))}", None),
+        "avg": lambda i: ("GET", f"/api/scores/avg/{rng.randint(1, args.students)}", None),
+        "avg_all": lambda i: ("GET", "/api/scores/avg_all", None),
+        "top": lambda i: ("GET", "/api/scores/top/10", None),
+        "signin": lambda i: ("POST", "/api/auth/signin", {"username": USERNAME, "password": PASSWORD}),
+        "add": add,
+    }
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+async def run_endpoint(client, headers, make_request, count: int, args) -> dict:
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(count))
+
+    async def worker():
+        for i in remaining:
+            method, path, body = make_request(i)
+            if args.cold:
+                response_cache.clear()
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            **{f"p{round(fraction * 100)}": round(percentile(latencies, fraction) * 1000, 3) for fraction in (0.5, 0.9, 0.95, 0.99)},
+            "max": round(latencies[-1] * 1000, 3),
+        },
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['latency_ms']['p95']} -> {current['latency_ms']['p95']} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+async def main() -> int:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    names = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    async with app.router.lifespan_context(app):
+        await seed(args)
+        requests = endpoint_requests(args, rng)
+        unknown = [name for name in names if name not in requests]
+        if unknown:
+            print(f"Unknown endpoints: {', '.join(unknown)}; choose from {', '.join(requests)}")
+            return 2
+        token = get_security_context().encode_token({
+            "sub": USERNAME, "role": "admin",
+            "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1),
+        })
+        headers = {"Authorization": f"Bearer {token}"}
+        results = {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            "endpoints": {},
+        }
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", limits=limits) as client:
+            print(f"{'endpoint':<10} {'req/s':>9} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  errors")
+            for name in names:
+                count = args.signin_requests if name == "signin" else args.requests
+                result = await run_endpoint(client, headers, requests[name], count, args)
+                results["endpoints"][name] = result
+                latency = result["latency_ms"]
+                print(
+                    f"{name:<10} {result['throughput_rps']:>9.1f} {latency['mean']:>9.2f} {latency['p50']:>9.2f} "
+                    f"{latency['p95']:>9.2f} {latency['p99']:>9.2f} {latency['max']:>9.2f}  {result['errors']}"
+                )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, Path
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from guard.guard_service import RoleGuard
+from auth.security_context import SecurityContext, get_security_context
+from database.database import engine, replica_engine, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from score.score_aggregate_repository import ScoreAggregateRepository
+from score.score_archive_repository import ScoreArchiveRepository
+from score.score_term import TERM_PATTERN
+from student.student_repository import student_cache
+from cache.table_versions import table_versions
+from cache.response_cache import response_cache
+from subject.subject_repository import subject_cache
+from database.database_pool import pool_stats
+from database.database_statement_cache import statement_cache_stats
+from score.score_leaderboard_cache import leaderboard_caches
+from metrics.metrics_store import request_metrics
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+    dependencies=[RoleGuard(["admin"])],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/password-hasher")
+async def get_password_hasher_stats(security: SecurityContext = Depends(get_security_context)):
+    return JSONResponse(content={"data": security.password_hasher.stats()}, status_code=200)
+
+@router.get("/token-cache")
+async def get_token_cache_stats(security: SecurityContext = Depends(get_security_context)):
+    return JSONResponse(content={"data": security.token_cache.stats()}, status_code=200)
+
+@router.get("/reference-cache")
+async def get_reference_cache_stats():
+    return JSONResponse(content={"data": [student_cache.stats(), subject_cache.stats()]}, status_code=200)
+
+@router.get("/response-cache")
+async def get_response_cache_stats():
+    return JSONResponse(content={"data": response_cache.stats()}, status_code=200)
+
+@router.get("/leaderboard-cache")
+async def get_leaderboard_cache_stats():
+    return JSONResponse(content={"data": [cache.stats() for cache in leaderboard_caches.values()]}, status_code=200)
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    data = {"primary": pool_stats(engine.pool)}
+    if replica_engine is not None:
+        data["replica"] = pool_stats(replica_engine.pool)
+    return JSONResponse(content={"data": data}, status_code=200)
+
+@router.get("/statement-cache")
+async def get_statement_cache_stats():
+    data = {"primary": statement_cache_stats(engine)}
+    if replica_engine is not None:
+        data["replica"] = statement_cache_stats(replica_engine)
+    return JSONResponse(content={"data": data}, status_code=200)
+
+@router.get("/score-aggregates/check")
+async def check_score_aggregates(db: AsyncSession = Depends(get_db)):
+    mismatches = await ScoreAggregateRepository(db).check()
+    return JSONResponse(content={"data": {"consistent": not mismatches, "mismatches": mismatches}}, status_code=200)
+
+@router.post("/score-aggregates/rebuild")
+async def rebuild_score_aggregates(db: AsyncSession = Depends(get_db)):
+    await ScoreAggregateRepository(db).rebuild()
+    await db.commit()
+    table_versions.bump("score")
+    return JSONResponse(content={"message": "Score aggregates rebuilt"}, status_code=200)
+
+@router.get("/score-archive")
+async def get_archived_terms(db: AsyncSession = Depends(get_db)):
+    terms = await ScoreArchiveRepository(db).list_terms()
+    return JSONResponse(content={"data": jsonable_encoder(terms)}, status_code=200)
+
+@router.post("/score-archive/{term}")
+async def archive_term(term: str = Path(pattern=TERM_PATTERN), db: AsyncSession = Depends(get_db)):
+    """Moves the scores of a closed term to score_archive. The score reads no
+    longer see them; the aggregate ones do with include_archive=true."""
+    try:
+        archived = await ScoreArchiveRepository(db).archive_term(term)
+    except ValueError as e:
+        return JSONResponse(content={"message": str(e)}, status_code=409)
+    await db.commit()
+    table_versions.bump("score")
+    return JSONResponse(content={"message": f"Archived {archived} scores of term {term}", "data": {"term": term, "archived": archived}}, status_code=200)
+
+@router.delete("/score-archive/{term}")
+async def restore_term(term: str = Path(pattern=TERM_PATTERN), db: AsyncSession = Depends(get_db)):
+    restored = await ScoreArchiveRepository(db).restore_term(term)
+    await db.commit()
+    table_versions.bump("score")
+    return JSONResponse(content={"message": f"Restored {restored} scores of term {term}", "data": {"term": term, "restored": restored}}, status_code=200)
+
+@router.get("/request-metrics")
+async def get_request_metrics():
+    return JSONResponse(content={"data": request_metrics.stats()}, status_code=200)
+
+@router.delete("/request-metrics")
+async def reset_request_metrics():
+    request_metrics.clear()
+    return JSONResponse(content={"message": "Request metrics reset"}, status_code=200)
@@ -5,6 +5,8 @@ from auth.auth_schema import SignInSchema, RefreshTokenRequest
 from database.database import get_db
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
+from auth.password_hasher import PasswordHasherBusyError
+from auth.security_context import SecurityContext, get_security_context
 
 
 router = APIRouter(
@@ -14,20 +16,30 @@ router = APIRouter(
 )
 
 @router.post("/signin")
-async def sign_in(user_data: SignInSchema, db: AsyncSession = Depends(get_db)):
+async def sign_in(
+    user_data: SignInSchema,
+    db: AsyncSession = Depends(get_db),
+    security: SecurityContext = Depends(get_security_context)
+):
     try:
-        auth_service = AuthService(db)
+        auth_service = AuthService(db, security)
         token = await auth_service.sign_in(user_data)
         if not token:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         return JSONResponse(content={"message": "Sign in successful", "data": jsonable_encoder(token)}, status_code=200)
+    except PasswordHasherBusyError as e:
+        return JSONResponse(content={"message": str(e)}, status_code=503, headers={"Retry-After": "1"})
     except Exception as e:
         return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
     
 @router.post("/refresh")
-async def refresh_access_token(refresh_token: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+async def refresh_access_token(
+    refresh_token: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db),
+    security: SecurityContext = Depends(get_security_context)
+):
     try:
-        auth_service = AuthService(db)
+        auth_service = AuthService(db, security)
         token = refresh_token.refresh_token
         if not token:
             raise HTTPException(status_code=400, detail="Refresh token is required")
@@ -1,21 +1,18 @@
 from user.user_repository import UserRepository
 from auth.auth_schema import SignInSchema, Token, AccessToken
 import jwt
-from passlib.context import CryptContext
+from auth.security_context import SecurityContext
 from datetime import datetime, timedelta, timezone
-import os
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class AuthService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, security: SecurityContext):
         self.user_repository = UserRepository(db)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        self.secret = os.getenv("SECRET_KEY")
-        self.algorithm = os.getenv("ALGORITHM")
+        self.security = security
 
     async def verify_password(self, password, hashed_password):
-        return self.pwd_context.verify(password, hashed_password)
+        return await self.security.password_hasher.verify(password, hashed_password)
 
     def create_access_token(self, data: dict, expires_delta: timedelta | None = None):
         to_encode = data.copy()
@@ -24,7 +21,7 @@ class AuthService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret, self.algorithm)
+        encoded_jwt = self.security.encode_token(to_encode)
         return encoded_jwt
     
     def create_refresh_token(self, data: dict, expires_delta: timedelta | None = None):
@@ -34,7 +31,7 @@ class AuthService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes = 30)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret, self.algorithm)
+        encoded_jwt = self.security.encode_token(to_encode)
         return encoded_jwt
 
     async def authenticate_user(self, username: str, password: str):
@@ -58,7 +55,7 @@ class AuthService:
     
     async def refresh_access_token(self, refresh_token: str) -> AccessToken:
         try:
-            payload = jwt.decode(refresh_token, self.secret, algorithms=[self.algorithm])
+            payload = self.security.decode_token(refresh_token)
             username: str = payload.get("sub")
             if username is None:
                 raise ValueError("Invalid refresh token")
@@ -67,7 +64,7 @@ class AuthService:
                 raise ValueError("User not found")
         except jwt.ExpiredSignatureError:
             raise ValueError("Refresh token has expired")
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
             raise ValueError("Invalid refresh token")
 
         access_token_expires = timedelta(minutes=15)
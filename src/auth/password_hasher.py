@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from metrics.metrics_registry import password_hash_duration, password_hash_queue_wait, password_hash_rejected
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify on a bounded thread pool so a burst of sign-ins
+    does not block the event loop. bcrypt releases the GIL, so threads scale
+    across cores without the pickling cost of a process pool."""
+
+    def __init__(self, pwd_context: CryptContext, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.pwd_context = pwd_context
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._hash_time_total = 0.0
+        self._hash_time_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.pwd_context.verify, password, hashed_password)
+
+    async def _run(self, operation: str, fn, *args):
+        # Everything past `workers` jobs is waiting in the executor queue; refuse
+        # new work instead of letting the queue (and sign-in latency) grow unbounded.
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            password_hash_rejected.inc()
+            raise PasswordHasherBusyError("Password hashing queue is full, try again later")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self._in_flight += 1
+        try:
+            result, queue_wait, hash_time = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._in_flight -= 1
+        self._completed += 1
+        self._queue_wait_total += queue_wait
+        self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+        self._hash_time_total += hash_time
+        self._hash_time_max = max(self._hash_time_max, hash_time)
+        password_hash_queue_wait.observe(queue_wait, operation)
+        password_hash_duration.observe(hash_time, operation)
+        return result
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self.workers, 0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "queue_wait_avg_ms": self._queue_wait_total / completed * 1000,
+            "queue_wait_max_ms": self._queue_wait_max * 1000,
+            "hash_time_avg_ms": self._hash_time_total / completed * 1000,
+            "hash_time_max_ms": self._hash_time_max * 1000,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
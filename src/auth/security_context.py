@@ -0,0 +1,131 @@
+import hashlib
+import os
+import time
+import jwt
+from jwt.algorithms import get_default_algorithms
+from passlib.context import CryptContext
+from auth.password_hasher import PasswordHasher
+from cache.lru_cache import TTLLRUCache
+from metrics.metrics_registry import jwt_verifications, jwt_decode_duration
+
+SECRET_KEY_FILE = os.getenv("SECRET_KEY_FILE")
+SECRET_KEY_RELOAD_SECONDS = float(os.getenv("SECRET_KEY_RELOAD_SECONDS", "30"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+def key_id(secret: str) -> str:
+    # Derived from the key itself so every worker agrees on the kid without
+    # sharing any state.
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+class SecurityContext:
+    """Process-wide auth material: the bcrypt context (and its worker pool),
+    the JWT keys and the allowed algorithms. Built once at startup
+    instead of on every request.
+
+    Keys come from SECRET_KEY, or from SECRET_KEY_FILE when set. The file holds
+    the signing key on the first line and any previous keys that should still
+    verify on the following lines; it is re-read when its mtime changes, so a
+    key can be rotated on every worker without a restart."""
+
+    def __init__(self, secret: str, algorithm: str, key_file: str | None = None):
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.password_hasher = PasswordHasher(self.pwd_context)
+        self.algorithm = algorithm
+        self.allowed_algorithms = [algorithm]
+        self._algorithm = get_default_algorithms()[algorithm]
+        self.key_file = key_file
+        self.token_cache = TTLLRUCache(TOKEN_CACHE_SIZE)
+        self._key_file_mtime = None
+        self._next_reload_check = 0.0
+        if key_file:
+            self.reload_keys(force=True)
+        else:
+            self.rotate_keys([secret])
+
+    def rotate_keys(self, secrets: list[str]):
+        """Sign with secrets[0]; keep verifying tokens signed with the rest."""
+        secrets = [secret for secret in secrets if secret]
+        if not secrets:
+            raise ValueError("At least one JWT secret key is required")
+        keys = {key_id(secret): self._algorithm.prepare_key(secret) for secret in secrets}
+        self.signing_kid = key_id(secrets[0])
+        self.signing_key = keys[self.signing_kid]
+        self.verification_keys = keys
+        # Claims verified with a key that may just have been retired must be checked again.
+        self.token_cache.clear()
+
+    def reload_keys(self, force: bool = False):
+        if not self.key_file:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_reload_check:
+            return
+        self._next_reload_check = now + SECRET_KEY_RELOAD_SECONDS
+        mtime = os.stat(self.key_file).st_mtime_ns
+        if mtime == self._key_file_mtime:
+            return
+        with open(self.key_file) as f:
+            secrets = [line.strip() for line in f if line.strip()]
+        self.rotate_keys(secrets)
+        self._key_file_mtime = mtime
+
+    def encode_token(self, claims: dict) -> str:
+        self.reload_keys()
+        return jwt.encode(claims, self.signing_key, self.algorithm, headers={"kid": self.signing_kid})
+
+    def decode_token(self, token: str) -> dict:
+        self.reload_keys()
+        if len(self.verification_keys) == 1:
+            return jwt.decode(token, self.signing_key, algorithms=self.allowed_algorithms)
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None:
+            key = self.verification_keys.get(kid)
+            if key is None:
+                raise jwt.InvalidTokenError("Unknown signing key")
+            return jwt.decode(token, key, algorithms=self.allowed_algorithms)
+        # Tokens issued before key ids were added: try every known key.
+        for key in self.verification_keys.values():
+            try:
+                return jwt.decode(token, key, algorithms=self.allowed_algorithms)
+            except jwt.InvalidSignatureError:
+                continue
+        raise jwt.InvalidSignatureError("Signature verification failed")
+
+    def verify_token(self, token: str) -> dict:
+        """decode_token() behind an LRU cache keyed by the token digest. Entries
+        expire at the token's exp, so an expired token is never served from it."""
+        self.reload_keys()
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self.token_cache.get(digest)
+        if claims is not None:
+            jwt_verifications.inc("cache_hit")
+            return claims
+        started = time.perf_counter()
+        try:
+            claims = self.decode_token(token)
+        except jwt.PyJWTError:
+            jwt_verifications.inc("invalid")
+            raise
+        jwt_decode_duration.observe(time.perf_counter() - started)
+        jwt_verifications.inc("decoded")
+        exp = claims.get("exp")
+        if exp is not None:
+            self.token_cache.set(digest, claims, expires_at=exp)
+        return claims
+
+_security_context: SecurityContext | None = None
+
+def init_security_context() -> SecurityContext:
+    global _security_context
+    _security_context = SecurityContext(os.getenv("SECRET_KEY"), os.getenv("ALGORITHM", "HS256"), SECRET_KEY_FILE)
+    return _security_context
+
+def close_security_context():
+    if _security_context is not None:
+        _security_context.password_hasher.shutdown()
+
+# Dependency to get the shared security context
+def get_security_context() -> SecurityContext:
+    if _security_context is None:
+        return init_security_context()
+    return _security_context
@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLLRUCache:
+    """Size-bounded LRU cache whose entries also expire at a wall-clock time.
+
+    With max_bytes, size_of(value) is added up over the entries and the least
+    recently used ones are evicted while the total is over max_bytes; a value
+    larger than max_bytes on its own is not stored.
+
+    Not thread-safe: it is meant to be used from the event loop only."""
+
+    def __init__(self, max_size: int, ttl: float | None = None, max_bytes: int | None = None, size_of=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.bytes = 0
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _size(self, value) -> int:
+        return self.size_of(value) if self.max_bytes is not None else 0
+
+    def set(self, key, value, expires_at: float | None = None):
+        self.delete(key)
+        size = self._size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        self._data[key] = (expires_at, value)
+        self.bytes += size
+        while len(self._data) > self.max_size or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.bytes -= self._size(evicted)
+            self.evictions += 1
+
+    def delete(self, key):
+        entry = self._data.pop(key, _MISSING)
+        if entry is not _MISSING:
+            self.bytes -= self._size(entry[1])
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if self.max_bytes is not None:
+            stats.update(bytes=self.bytes, max_bytes=self.max_bytes)
+        return stats
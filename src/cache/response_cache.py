@@ -0,0 +1,76 @@
+import functools
+import hashlib
+import inspect
+import os
+import time
+from fastapi import Request
+from fastapi.responses import Response
+from cache.lru_cache import TTLLRUCache
+from cache.table_versions import table_versions
+from database.database import replica_engine
+from database.database_config import settings
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(1024 * 1024)))
+# Total size of the stored bodies per worker
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# With a replica, a version bumped on the primary may not have replicated yet;
+# such responses are not cached or tagged until the replica has had time to catch up.
+REPLICA_LAG_NS = int(settings.READ_YOUR_WRITES_SECONDS * 1e9) if replica_engine is not None else 0
+
+response_cache = TTLLRUCache(RESPONSE_CACHE_SIZE, max_bytes=RESPONSE_CACHE_MAX_BYTES, size_of=lambda entry: len(entry[0]))
+
+def _if_none_match(request: Request) -> set:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def cached_response(*tables: str, max_age: int = 0):
+    """Conditional GET and body caching for a read endpoint.
+
+    The ETag is derived from the route, the query string, the caller's role and
+    the shared versions of `tables`, which every write to them bumps. A matching
+    If-None-Match gets 304, and a repeated request is answered from the stored
+    body without touching the database or serializing again. The guard must
+    have put the caller's claims on request.state first (RoleGuard does)."""
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        inject_request = "request" not in signature.parameters
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.pop("request") if inject_request else kwargs["request"]
+            versions = tuple(table_versions.get(table) for table in tables)
+            if REPLICA_LAG_NS and time.time_ns() - max(versions) < REPLICA_LAG_NS:
+                return await endpoint(*args, **kwargs)
+
+            role = getattr(request.state, "claims", {}).get("role")
+            # Old versions are simply never looked up again and age out of the LRU.
+            key = (request.url.path, request.url.query, role, versions)
+            etag = '"%s"' % hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+            headers = {
+                "ETag": etag,
+                "Cache-Control": f"private, max-age={max_age}" if max_age else "private, no-cache",
+                "Vary": "Authorization",
+            }
+            if etag in _if_none_match(request):
+                return Response(status_code=304, headers=headers)
+            entry = response_cache.get(key)
+            if entry is not None:
+                return Response(content=entry[0], media_type=entry[1], headers=headers)
+
+            response = await endpoint(*args, **kwargs)
+            body = getattr(response, "body", None)
+            if response.status_code == 200 and body is not None:
+                response.headers.update(headers)
+                if len(body) <= RESPONSE_CACHE_MAX_BODY_BYTES:
+                    response_cache.set(key, (body, response.media_type))
+            return response
+
+        if inject_request:
+            parameters = list(signature.parameters.values())
+            parameters.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+    return decorator
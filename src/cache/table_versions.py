@@ -0,0 +1,59 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+CACHE_VERSION_FILE = os.getenv(
+    "CACHE_VERSION_FILE", os.path.join(tempfile.gettempdir(), "studentscoremanager-table-versions")
+)
+# Fixed slot per table; append new tables at the end so slots stay stable.
+TABLES = ("student", "subject", "score", "user")
+_SLOT = struct.Struct("<Q")
+
+class TableVersions:
+    """Per-table version counters shared by every worker process on the host.
+
+    The counters live in a small memory-mapped file, so reading one is a plain
+    memory read. A write bumps the table's counter after it commits; caches
+    remember the version they were filled at and drop their entries as soon as
+    it changes, in whichever worker the write happened."""
+
+    def __init__(self, path: str = CACHE_VERSION_FILE):
+        self.path = path
+        self._map = None
+        self._local = [0] * len(TABLES)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                size = _SLOT.size * len(TABLES)
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self._map = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            # Still correct within this process, just not shared across workers.
+            print(f"Table versions are process-local, cannot map {path}: {e}")
+
+    def get(self, table: str) -> int:
+        slot = TABLES.index(table)
+        if self._map is None:
+            return self._local[slot]
+        return _SLOT.unpack_from(self._map, slot * _SLOT.size)[0]
+
+    def bump(self, table: str) -> tuple[int, int]:
+        """Returns (previous, new): a cache that applied the write itself can
+        check that `previous` is the version it already had."""
+        slot = TABLES.index(table)
+        # A timestamp rather than +1: two workers bumping at once cannot
+        # write the same value back, so no bump is ever lost.
+        previous = self.get(table)
+        version = max(time.time_ns(), previous + 1)
+        if self._map is None:
+            self._local[slot] = version
+        else:
+            _SLOT.pack_into(self._map, slot * _SLOT.size, version)
+        return previous, version
+
+table_versions = TableVersions()
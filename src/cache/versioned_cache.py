@@ -0,0 +1,43 @@
+import os
+from cache.lru_cache import TTLLRUCache
+from cache.table_versions import table_versions
+
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "10000"))
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+
+MISSING = object()
+
+class VersionedCache:
+    """TTL+LRU cache for rows of one table, emptied whenever the table's
+    shared version changes (see TableVersions)."""
+
+    def __init__(self, table: str, max_size: int, ttl: float):
+        self.table = table
+        self.cache = TTLLRUCache(max_size, ttl)
+        self._version = table_versions.get(table)
+        self.invalidations = 0
+
+    def version(self) -> int:
+        version = table_versions.get(self.table)
+        if version != self._version:
+            self.cache.clear()
+            self._version = version
+            self.invalidations += 1
+        return version
+
+    def get(self, key, default=MISSING):
+        self.version()
+        return self.cache.get(key, default)
+
+    def set(self, key, value, version: int):
+        # `version` is the one read before loading the value; if a write
+        # landed in between, the value may be stale and is not kept.
+        if self.version() == version:
+            self.cache.set(key, value)
+
+    def invalidate(self):
+        table_versions.bump(self.table)
+        self.version()
+
+    def stats(self) -> dict:
+        return {"table": self.table, "invalidations": self.invalidations, **self.cache.stats()}
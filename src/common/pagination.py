@@ -0,0 +1,45 @@
+import time
+from typing import AsyncIterator, Callable, Sequence
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import read_session_factory
+from metrics.metrics_context import record_serialization
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def split_page(rows: Sequence, limit: int, cursor_key: str):
+    # Repositories fetch limit + 1 rows so we know whether another page exists
+    # without an extra COUNT query.
+    items = list(rows[:limit])
+    next_cursor = items[-1][cursor_key] if len(rows) > limit else None
+    return items, next_cursor
+
+def ndjson_response(request: Request, stream_rows: Callable[[AsyncSession], AsyncIterator], row_adapter: TypeAdapter):
+    def encode(rows: list) -> bytes:
+        started = time.perf_counter()
+        data = b"\n".join([row_adapter.dump_json(row) for row in rows]) + b"\n"
+        record_serialization(time.perf_counter() - started, len(rows))
+        return data
+
+    # The streaming body outlives the request-scoped session from get_read_db, so
+    # it opens (and closes) its own session for the duration of the stream, on
+    # the database get_read_db would have picked for this request.
+    session_factory = read_session_factory(request)
+
+    async def body():
+        async with session_factory() as session:
+            chunk = []
+            async for row in stream_rows(session):
+                chunk.append(row)
+                if len(chunk) >= STREAM_CHUNK_ROWS:
+                    yield encode(chunk)
+                    chunk = []
+            if chunk:
+                yield encode(chunk)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
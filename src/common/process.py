@@ -0,0 +1,11 @@
+import os
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this pid exists on the host (signal 0 only checks)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
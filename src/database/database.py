@@ -1,20 +1,44 @@
+import time
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from database.database_config import settings
+from database.database_dialects import configure_engine, engine_options
+from database.database_statement_cache import track_statement_cache
+from database.database_timing import track_query_timing
 
 # Define the Base model for SQLAlchemy
 class Base(DeclarativeBase):
     pass
-# Create an async engine
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
 
-# Async session factory
+def create_db_engine(url: str):
+    db_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        **engine_options(url),
+    )
+    configure_engine(db_engine)
+    track_statement_cache(db_engine)
+    track_query_timing(db_engine)
+    return db_engine
+
+# Create an async engine for the primary and, if configured, the read replica
+engine = create_db_engine(settings.DATABASE_URL)
+replica_engine = create_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+# Async session factories
 AsyncSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(bind=replica_engine or engine, class_=AsyncSession, expire_on_commit=False)
+
+# Set on responses to writes; while it is in the future, reads go to the primary
+READ_PRIMARY_COOKIE = "db_read_primary_until"
 
-# Initialize database (Create tables)
+# Initialize database (Apply schema migrations)
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_AUTO_MIGRATE:
+        from database.database_migrations import run_migrations
+        await run_migrations(engine)
 
 # Dependency to get a database session
 async def get_db():
@@ -24,5 +48,24 @@ async def get_db():
     finally:
         await db.close()  # Ensure session is closed
 
+def reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_session_factory(request: Request):
+    return AsyncSessionLocal if reads_pinned_to_primary(request) else ReadSessionLocal
+
+# Dependency to get a session for read-only endpoints
+async def get_read_db(request: Request):
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        await db.close()
+
 async def close_db():
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
@@ -9,7 +9,31 @@ PORT = os.getenv("DB_PORT")
 DATABASE = os.getenv("DB_NAME")
 
 class Settings:
-    DATABASE_URL = f"mysql+aiomysql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
+    DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+aiomysql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    # Apply pending schema migrations in init_db()
+    DB_AUTO_MIGRATE: bool = os.getenv("DB_AUTO_MIGRATE", "True").lower() == "true"
 
-settings = Settings()
\ No newline at end of file
+    # Optional read replica used by GET endpoints
+    DATABASE_REPLICA_URL: str | None = os.getenv("DATABASE_REPLICA_URL") or None
+    # After a write, the same client reads from the primary for this many seconds
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+    # Connection pool, per uvicorn worker
+    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() == "true"
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", "500"))
+
+    # Applied to every connection when DATABASE_URL is sqlite+aiosqlite://
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Negative values are KiB, as in PRAGMA cache_size
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+settings = Settings()
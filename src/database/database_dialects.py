@@ -0,0 +1,64 @@
+"""Per-backend engine options. The backend is chosen by the scheme of
+DATABASE_URL: mysql+aiomysql (MariaDB/MySQL, the default) or sqlite+aiosqlite
+for single-node and test deployments."""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import StaticPool
+from database.database_config import settings
+from database.database_pool import InstrumentedQueuePool
+
+def is_sqlite_memory(url) -> bool:
+    database = url.database or ""
+    return database in ("", ":memory:") or "mode=memory" in database or url.query.get("mode") == "memory"
+
+def engine_options(url: str) -> dict:
+    """Pool options for create_async_engine."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        }
+    if is_sqlite_memory(parsed):
+        # Every connection to :memory: is a separate empty database, so all
+        # sessions share the one connection.
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    # A local file cannot drop a connection, so there is nothing to pre-ping or
+    # recycle; with WAL, readers on other pooled connections do not block the writer.
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": False,
+    }
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def configure_engine(engine: AsyncEngine):
+    """Runs the SQLite PRAGMAs on every new connection. PRAGMAs other than
+    journal_mode only last for the connection, so they cannot be set once."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
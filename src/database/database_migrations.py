@@ -0,0 +1,106 @@
+"""Versioned schema migrations.
+
+Each module in database/migrations is named v<NNN>_<description>.py and defines
+upgrade(conn), which receives a synchronous Connection. Applied versions are
+recorded in the schema_migrations table. Migrations describe the schema as of
+their own version (they do not import the ORM models) and must be safe to run
+against a database that was created by the old Base.metadata.create_all, so
+they check for existing tables and indexes first.
+
+Run them out of band before starting a new release:
+    python -m database.database_migrations
+or let init_db() apply them at startup (DB_AUTO_MIGRATE, on by default).
+"""
+import asyncio
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+MIGRATIONS_PACKAGE = "database.migrations"
+MIGRATION_LOCK_TIMEOUT = 300
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def discover_migrations():
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        name = module_info.name
+        if not name.startswith("v") or "_" not in name:
+            continue
+        version = int(name[1:name.index("_")])
+        migrations.append((version, name, importlib.import_module(f"{MIGRATIONS_PACKAGE}.{name}")))
+    migrations.sort(key=lambda migration: migration[0])
+    return migrations
+
+def is_mysql(conn: Connection) -> bool:
+    return conn.dialect.name in ("mysql", "mariadb")
+
+def create_index(conn: Connection, name: str, table: str, columns: list[str]):
+    """Create an index unless it exists. On MariaDB/MySQL the index is built
+    in place without locking the table, so it can run against a live table."""
+    if name in {index["name"] for index in inspect(conn).get_indexes(table)}:
+        return
+    preparer = conn.dialect.identifier_preparer
+    column_list = ", ".join(preparer.quote(column) for column in columns)
+    ddl = f"CREATE INDEX {preparer.quote(name)} ON {preparer.quote(table)} ({column_list})"
+    if is_mysql(conn):
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    conn.exec_driver_sql(ddl)
+
+def _lock(conn: Connection):
+    # Several uvicorn workers may start at once; only one should migrate.
+    if is_mysql(conn):
+        acquired = conn.execute(text("SELECT GET_LOCK('schema_migrations', :timeout)"), {"timeout": MIGRATION_LOCK_TIMEOUT}).scalar()
+        if acquired != 1:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+
+def _unlock(conn: Connection):
+    if is_mysql(conn):
+        conn.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+
+def _applied_versions(conn: Connection) -> set:
+    migration_metadata.create_all(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+async def run_migrations(engine: AsyncEngine) -> list[str]:
+    applied_now = []
+    async with engine.connect() as conn:
+        await conn.run_sync(_lock)
+        try:
+            applied = await conn.run_sync(_applied_versions)
+            await conn.commit()
+            for version, name, module in discover_migrations():
+                if version in applied:
+                    continue
+                print(f"Applying migration {name}")
+                await conn.run_sync(module.upgrade)
+                await conn.execute(
+                    schema_migrations.insert().values(version=version, name=name, applied_at=datetime.now(timezone.utc).replace(tzinfo=None))
+                )
+                await conn.commit()
+                applied_now.append(name)
+        finally:
+            await conn.run_sync(_unlock)
+    return applied_now
+
+async def main():
+    from database.database import engine, close_db
+    try:
+        applied = await run_migrations(engine)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
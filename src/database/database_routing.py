@@ -0,0 +1,34 @@
+import time
+from http.cookies import SimpleCookie
+from database.database import READ_PRIMARY_COOKIE, replica_engine
+from database.database_config import settings
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for READ_YOUR_WRITES_SECONDS after
+    a successful write, so it does not read stale data from a lagging replica.
+    Does nothing when no replica is configured."""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = replica_engine is not None and settings.READ_YOUR_WRITES_SECONDS > 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[READ_PRIMARY_COOKIE] = str(time.time() + settings.READ_YOUR_WRITES_SECONDS)
+                cookie[READ_PRIMARY_COOKIE]["max-age"] = int(settings.READ_YOUR_WRITES_SECONDS) + 1
+                cookie[READ_PRIMARY_COOKIE]["path"] = "/"
+                cookie[READ_PRIMARY_COOKIE]["httponly"] = True
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.output(header="").strip().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
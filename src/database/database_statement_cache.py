@@ -0,0 +1,41 @@
+import weakref
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+class StatementCacheStats:
+    """Counts how each statement run on an engine was compiled: taken from the
+    engine's compiled cache, compiled and added to it, or not cacheable."""
+
+    def __init__(self, sync_engine: Engine):
+        self.engine = sync_engine
+        self.counts = Counter()
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            self.counts[context.cache_hit] += 1
+
+    def stats(self) -> dict:
+        hits = self.counts[CacheStats.CACHE_HIT]
+        misses = self.counts[CacheStats.CACHE_MISS]
+        cache = self.engine._compiled_cache
+        return {
+            "hits": hits,
+            "misses": misses,
+            "uncached": sum(self.counts.values()) - hits - misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+            "size": len(cache) if cache is not None else 0,
+            "max_size": cache.capacity if cache is not None else 0,
+        }
+
+_trackers: "weakref.WeakKeyDictionary[Engine, StatementCacheStats]" = weakref.WeakKeyDictionary()
+
+def track_statement_cache(engine: AsyncEngine):
+    _trackers[engine.sync_engine] = StatementCacheStats(engine.sync_engine)
+
+def statement_cache_stats(engine: AsyncEngine) -> dict | None:
+    tracker = _trackers.get(engine.sync_engine)
+    return tracker.stats() if tracker else None
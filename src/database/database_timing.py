@@ -0,0 +1,23 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from metrics.metrics_context import current_request_timing
+
+# Statements on one connection run one at a time, so a single slot is enough;
+# a statement that raises just leaves it to be overwritten by the next one.
+_STARTED = "query_timing_started"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info[_STARTED] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop(_STARTED, None)
+    timing = current_request_timing.get()
+    if started is not None and timing is not None:
+        timing.add_statement(statement, time.perf_counter() - started)
+
+def track_query_timing(engine: AsyncEngine):
+    """Adds the time and count of every statement run on the engine to the
+    current request's RequestTiming."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
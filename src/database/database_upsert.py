@@ -0,0 +1,64 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def upsert_statement(dialect_name: str, table, key: str, build_set):
+    """INSERT that updates the row on a primary key conflict.
+
+    build_set(incoming) returns the SET clause; `incoming` gives access to the
+    values of the row that could not be inserted (VALUES()/excluded)."""
+    if dialect_name in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(build_set(stmt.inserted))
+    if dialect_name in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect_name == "sqlite" else postgresql).insert(table)
+        return stmt.on_conflict_do_update(index_elements=[key], set_=build_set(stmt.excluded))
+    raise NotImplementedError(f"Upsert is not supported for the {dialect_name} dialect")
+
+def least(dialect_name: str, *args):
+    # SQLite spells the scalar (non-aggregate) forms as multi-argument MIN/MAX.
+    return func.min(*args) if dialect_name == "sqlite" else func.least(*args)
+
+def greatest(dialect_name: str, *args):
+    return func.max(*args) if dialect_name == "sqlite" else func.greatest(*args)
+
+async def upsert_rows(db: AsyncSession, model, key: str, rows: list[dict], chunk_size: int = 500):
+    """Insert or update rows by primary key, committing every chunk.
+
+    Existing rows for a chunk are read with one query, so rows that would not
+    change are skipped and the summary can tell inserts from updates without
+    relying on dialect-specific rowcount semantics."""
+    table = model.__table__
+    # The last occurrence of a key wins, as it would with sequential updates.
+    rows = list({row[key]: row for row in rows}.values())
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+    if not rows:
+        return summary
+    columns = list(rows[0].keys())
+    stmt = upsert_statement(
+        db.get_bind().dialect.name, table, key,
+        lambda incoming: {column: incoming[column] for column in columns if column != key},
+    )
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            result = await db.execute(
+                select(*(table.c[column] for column in columns)).filter(table.c[key].in_([row[key] for row in chunk]))
+            )
+            existing = {row[key]: dict(row) for row in result.mappings()}
+            inserts = [row for row in chunk if row[key] not in existing]
+            updates = [row for row in chunk if row[key] in existing and existing[row[key]] != row]
+            if inserts or updates:
+                await db.execute(stmt, inserts + updates)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            summary["failed"] += len(chunk)
+            summary["errors"].append({"first_key": chunk[0][key], "last_key": chunk[-1][key], "error": str(e.orig if getattr(e, "orig", None) else e)})
+            continue
+        summary["inserted"] += len(inserts)
+        summary["updated"] += len(updates)
+        summary["unchanged"] += len(chunk) - len(inserts) - len(updates)
+    return summary
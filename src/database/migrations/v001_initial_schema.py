@@ -0,0 +1,35 @@
+"""Tables as they were created by Base.metadata.create_all before migrations."""
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+def upgrade(conn: Connection):
+    metadata = MetaData()
+    Table(
+        "student", metadata,
+        Column("student_id", Integer, primary_key=True, autoincrement=False),
+        Column("name", String(255)),
+        Column("birthdate", Date),
+        Column("class_", String(255)),
+    )
+    Table(
+        "subject", metadata,
+        Column("subject_id", Integer, primary_key=True, autoincrement=False),
+        Column("name", String(255), nullable=False, unique=True),
+        Column("amount", Integer),
+    )
+    Table(
+        "score", metadata,
+        # SQLite cannot autoincrement a column of a composite primary key (see v006).
+        Column("score_id", Integer, primary_key=True, autoincrement=conn.dialect.name != "sqlite"),
+        Column("student_id", Integer, ForeignKey("student.student_id"), primary_key=True, autoincrement=False),
+        Column("subject_id", Integer, ForeignKey("subject.subject_id"), primary_key=True, autoincrement=False),
+        Column("score", Float),
+        Column("date", Date),
+    )
+    Table(
+        "user", metadata,
+        Column("username", String(255), nullable=False, unique=True, primary_key=True),
+        Column("password", String(255), nullable=False),
+        Column("role", String(50), nullable=False),
+    )
+    metadata.create_all(conn, checkfirst=True)
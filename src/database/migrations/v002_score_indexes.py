@@ -0,0 +1,11 @@
+"""Secondary indexes for the score access paths in ScoreRepository."""
+from sqlalchemy.engine import Connection
+from database.database_migrations import create_index
+
+def upgrade(conn: Connection):
+    # get_student_scores: filter by student, order by score
+    create_index(conn, "ix_score_student_id_score", "score", ["student_id", "score"])
+    # calculate_all_avg_scores / get_max_subject_scores: group or partition by subject
+    create_index(conn, "ix_score_subject_id_score", "score", ["subject_id", "score"])
+    # get_top_scores: order by score over the whole table
+    create_index(conn, "ix_score_score", "score", ["score"])
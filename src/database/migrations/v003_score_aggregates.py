@@ -0,0 +1,33 @@
+"""Per-student and per-subject score aggregate tables, backfilled from score."""
+from sqlalchemy import Column, Float, Integer, MetaData, Table, func, inspect, select
+from sqlalchemy.engine import Connection
+
+def upgrade(conn: Connection):
+    metadata = MetaData()
+    score = Table("score", metadata, autoload_with=conn)
+    existing = set(inspect(conn).get_table_names())
+    for table_name, key in (("student_score_aggregate", "student_id"), ("subject_score_aggregate", "subject_id")):
+        if table_name in existing:
+            continue
+        table = Table(
+            table_name, metadata,
+            Column(key, Integer, primary_key=True, autoincrement=False),
+            Column("score_count", Integer, nullable=False, default=0),
+            Column("score_sum", Float, nullable=False, default=0),
+            Column("score_sum_sq", Float, nullable=False, default=0),
+            Column("score_min", Float, nullable=True),
+            Column("score_max", Float, nullable=True),
+        )
+        table.create(conn)
+        group = score.c[key]
+        conn.execute(table.insert().from_select(
+            [key, "score_count", "score_sum", "score_sum_sq", "score_min", "score_max"],
+            select(
+                group,
+                func.count(score.c.score),
+                func.coalesce(func.sum(score.c.score), 0),
+                func.coalesce(func.sum(score.c.score * score.c.score), 0),
+                func.min(score.c.score),
+                func.max(score.c.score),
+            ).group_by(group),
+        ))
@@ -0,0 +1,7 @@
+"""Index for the per-class reads in StudentRepository."""
+from sqlalchemy.engine import Connection
+from database.database_migrations import create_index
+
+def upgrade(conn: Connection):
+    # get_class_transcripts: filter by class, join the scores by student
+    create_index(conn, "ix_student_class_student_id", "student", ["class_", "student_id"])
@@ -0,0 +1,26 @@
+"""Date index on score and the score_archive table for closed terms."""
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, MetaData, String, Table, inspect
+from sqlalchemy.engine import Connection
+from database.database_migrations import create_index
+
+def upgrade(conn: Connection):
+    # from/to/term filters on the score reads, and finding a term to archive
+    create_index(conn, "ix_score_date", "score", ["date"])
+    if "score_archive" in inspect(conn).get_table_names():
+        return
+    metadata = MetaData()
+    Table(
+        "score_archive", metadata,
+        # score_id stays unique across score and score_archive, so it alone is the key.
+        Column("score_id", Integer, primary_key=True, autoincrement=False),
+        Column("student_id", Integer, nullable=False),
+        Column("subject_id", Integer, nullable=False),
+        Column("score", Float),
+        Column("date", Date),
+        Column("term", String(16), nullable=False),
+        Column("archived_at", DateTime, nullable=False),
+        Index("ix_score_archive_term", "term"),
+        Index("ix_score_archive_student_id_score", "student_id", "score"),
+        Index("ix_score_archive_subject_id_score", "subject_id", "score"),
+        Index("ix_score_archive_date", "date"),
+    ).create(conn)
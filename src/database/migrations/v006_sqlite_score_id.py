@@ -0,0 +1,48 @@
+"""On SQLite, make score_id the table's own INTEGER PRIMARY KEY.
+
+SQLite only autoincrements a single-column INTEGER PRIMARY KEY, so with the
+composite key from v001 it left score_id for the caller to fill in. The table
+is rebuilt with score_id as the key (student_id and subject_id keep their
+foreign keys and become NOT NULL columns) and AUTOINCREMENT, so an id is never
+handed out twice, including ids of scores that were moved to score_archive.
+Other dialects already autoincrement score_id and are left alone.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from database.database_migrations import create_index
+
+def upgrade(conn: Connection):
+    if conn.dialect.name != "sqlite":
+        return
+    if inspect(conn).get_pk_constraint("score")["constrained_columns"] == ["score_id"]:
+        return
+    conn.exec_driver_sql(
+        "CREATE TABLE score_v006 ("
+        "score_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "student_id INTEGER NOT NULL REFERENCES student (student_id), "
+        "subject_id INTEGER NOT NULL REFERENCES subject (subject_id), "
+        "score FLOAT, "
+        "date DATE)"
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO score_v006 (score_id, student_id, subject_id, score, date) "
+        "SELECT score_id, student_id, subject_id, score, date FROM score"
+    )
+    # The copy set the sequence to the highest id in score; archived ids count too.
+    if "score_archive" in inspect(conn).get_table_names():
+        conn.exec_driver_sql(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(score_id), 0) FROM score_archive)) "
+            "WHERE name = 'score_v006'"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO sqlite_sequence (name, seq) "
+            "SELECT 'score_v006', MAX(score_id) FROM score_archive "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'score_v006') "
+            "HAVING MAX(score_id) IS NOT NULL"
+        )
+    conn.exec_driver_sql("DROP TABLE score")
+    conn.exec_driver_sql("ALTER TABLE score_v006 RENAME TO score")
+    create_index(conn, "ix_score_student_id_score", "score", ["student_id", "score"])
+    create_index(conn, "ix_score_subject_id_score", "score", ["subject_id", "score"])
+    create_index(conn, "ix_score_score", "score", ["score"])
+    create_index(conn, "ix_score_date", "score", ["date"])
@@ -1,15 +1,13 @@
 from abc import ABC, abstractmethod
 from fastapi import Depends, HTTPException, status, Request
 import jwt
-import os
 from typing import List, Annotated
 from fastapi.security import OAuth2PasswordBearer
+from auth.security_context import SecurityContext, get_security_context
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
 class BaseGuard(ABC):
     @abstractmethod
-    async def validate(self, request: Request):
+    async def validate(self, request: Request, security: SecurityContext):
         pass
 
 class APIRoleGuard(BaseGuard):
@@ -29,46 +27,52 @@ class APIRoleGuard(BaseGuard):
             return None
         return auth_header.split(" ")[1]
     
-    def decode_jwt(self, token: str):
+    def decode_jwt(self, token: str, security: SecurityContext):
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = security.verify_token(token)
             return payload
         except jwt.ExpiredSignatureError:
             raise self.credentials_exception("Token has expired")
         except jwt.InvalidTokenError:
             raise self.credentials_exception("Invalid token")
     
-    async def validate(self, request: Request):
+    async def validate(self, request: Request, security: SecurityContext):
         token = self.extract_token_from_header(request)
         if not token:
             raise self.credentials_exception("Not authenticated")
         
-        payload = self.decode_jwt(token)
+        payload = self.decode_jwt(token, security)
+        request.state.claims = payload
         role = payload.get("role")
         if not role or role not in self.allowed_roles:
             raise self.credentials_exception("Forbidden: Insufficient permissions")
         
 def RoleGuard(allowed_roles: List[str]):
-    async def guard(request: Request):
-        guard = APIRoleGuard(allowed_roles)
-        await guard.validate(request)
+    role_guard = APIRoleGuard(allowed_roles)
+    async def guard(request: Request, security: SecurityContext = Depends(get_security_context)):
+        await role_guard.validate(request, security)
     return Depends(guard)
 
 
-def get_current_username(token: Annotated[str, Depends(OAuth2PasswordBearer(tokenUrl="token"))]):
+def get_current_username(
+    request: Request,
+    token: Annotated[str, Depends(OAuth2PasswordBearer(tokenUrl="token"))],
+    security: SecurityContext = Depends(get_security_context)
+):
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = security.verify_token(token)
+        request.state.claims = payload
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except jwt.ExpiredSignatureError:
         raise credentials_exception
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise credentials_exception
 
     return username
\ No newline at end of file
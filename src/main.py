@@ -5,17 +5,30 @@ from student import student_controller
 from subject import subject_controller
 from score import score_controller
 from fastapi.middleware.cors import CORSMiddleware
+from database.database_routing import ReadYourWritesMiddleware
+from metrics.metrics_middleware import RequestMetricsMiddleware
 from auth import auth_controller
 from user import user_controller
+from admin import admin_controller
+from report import report_controller
+from report.report_queue import report_queue
+from metrics import metrics_controller
+from metrics.metrics_registry import metrics_registry
+from auth.security_context import init_security_context, close_security_context
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🔄 Initializing Database...")
     await init_db() 
+    init_security_context()
+    metrics_registry.fold_exited()
     try:
         yield  
     finally:
         print("🛑 Shutting down application...")
+        await report_queue.shutdown()
+        metrics_registry.flush()
+        close_security_context()
         await close_db()
 
 # Create FastAPI App with lifespan event
@@ -39,10 +52,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+# Added last so it is the outermost middleware and times the whole request.
+app.add_middleware(RequestMetricsMiddleware)
 
 # Register Routers
 app.include_router(student_controller.router)
 app.include_router(subject_controller.router)
 app.include_router(score_controller.router)
 app.include_router(auth_controller.router)
-app.include_router(user_controller.router)
\ No newline at end of file
+app.include_router(user_controller.router)
+app.include_router(admin_controller.router)
+app.include_router(report_controller.router)
+app.include_router(metrics_controller.router)
\ No newline at end of file
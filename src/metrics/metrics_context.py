@@ -0,0 +1,42 @@
+import time
+from contextvars import ContextVar
+
+MAX_RECORDED_STATEMENTS = 50
+
+class RequestTiming:
+    """What one request spent on SQL and serialization. Filled by the engine
+    hooks and the response helpers while the request runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.statements = 0
+        self.serialization_time = 0.0
+        self.rows = 0
+        # (statement, seconds) for the slow request log; statement strings come
+        # from the compiled cache, so keeping them costs a reference each.
+        self.sql: list[tuple[str, float]] = []
+        self.finished = False
+
+    def add_statement(self, statement: str, seconds: float):
+        # Tasks started by the request (report jobs) inherit this object; ignore
+        # what they run after the response is complete.
+        if self.finished:
+            return
+        self.db_time += seconds
+        self.statements += 1
+        if len(self.sql) < MAX_RECORDED_STATEMENTS:
+            self.sql.append((statement, seconds))
+
+    def add_serialization(self, seconds: float, rows: int):
+        if self.finished:
+            return
+        self.serialization_time += seconds
+        self.rows += rows
+
+current_request_timing: ContextVar[RequestTiming | None] = ContextVar("current_request_timing", default=None)
+
+def record_serialization(seconds: float, rows: int):
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.add_serialization(seconds, rows)
@@ -0,0 +1,94 @@
+import hmac
+import os
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response
+from auth.security_context import get_security_context
+from cache.response_cache import response_cache
+from database.database import engine, replica_engine
+from database.database_pool import pool_stats
+from database.database_statement_cache import statement_cache_stats
+from metrics.metrics_registry import metrics_registry
+from student.student_repository import student_cache
+from subject.subject_repository import subject_cache
+
+# Prometheus scrapers do not sign in; set this to require "Authorization: Bearer <token>".
+METRICS_BEARER_TOKEN = os.getenv("METRICS_BEARER_TOKEN")
+OPENMETRICS_MEDIA_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+router = APIRouter(
+    tags=["metrics"],
+    responses={404: {"description": "Not found"}},
+)
+
+def _engines():
+    engines = [("primary", engine)]
+    if replica_engine is not None:
+        engines.append(("replica", replica_engine))
+    return engines
+
+def _pools():
+    return [(name, pool_stats(db_engine.pool)) for name, db_engine in _engines()]
+
+def _caches():
+    return [
+        ("response", response_cache.stats()),
+        ("student", student_cache.stats()),
+        ("subject", subject_cache.stats()),
+        ("token", get_security_context().token_cache.stats()),
+    ]
+
+def _statement_caches():
+    return [(name, statement_cache_stats(db_engine)) for name, db_engine in _engines()]
+
+metrics_registry.collector(
+    "db_pool_connections", "gauge", "Connections of each engine's pool by state.", ("engine", "state"),
+    lambda: [
+        ((name, state), stats[state])
+        for name, stats in _pools()
+        for state in ("size", "checked_in", "checked_out", "overflow")
+        if stats[state] is not None
+    ],
+)
+metrics_registry.collector(
+    "db_pool_checkouts", "counter", "Connection checkouts.", ("engine",),
+    lambda: [((name,), stats["checkouts"]) for name, stats in _pools() if "checkouts" in stats],
+)
+metrics_registry.collector(
+    "db_pool_checkout_timeouts", "counter", "Checkouts that gave up after DB_POOL_TIMEOUT.", ("engine",),
+    lambda: [((name,), stats["checkout_timeouts"]) for name, stats in _pools() if "checkout_timeouts" in stats],
+)
+metrics_registry.collector(
+    "db_pool_checkout_wait_seconds", "counter", "Total time spent waiting for a connection.", ("engine",),
+    lambda: [((name,), stats["wait_total_ms"] / 1000) for name, stats in _pools() if "checkouts" in stats],
+)
+metrics_registry.collector(
+    "cache_hits", "counter", "In-process cache hits.", ("cache",),
+    lambda: [((name,), stats["hits"]) for name, stats in _caches()]
+    + [((f"statement_{name}",), stats["hits"]) for name, stats in _statement_caches() if stats],
+)
+metrics_registry.collector(
+    "cache_misses", "counter", "In-process cache misses.", ("cache",),
+    lambda: [((name,), stats["misses"]) for name, stats in _caches()]
+    + [((f"statement_{name}",), stats["misses"]) for name, stats in _statement_caches() if stats],
+)
+metrics_registry.collector(
+    "cache_evictions", "counter", "Entries evicted to stay within the cache size.", ("cache",),
+    lambda: [((name,), stats["evictions"]) for name, stats in _caches()],
+)
+metrics_registry.collector(
+    "cache_entries", "gauge", "Entries currently held.", ("cache",),
+    lambda: [((name,), stats["size"]) for name, stats in _caches()]
+    + [((f"statement_{name}",), stats["size"]) for name, stats in _statement_caches() if stats],
+)
+metrics_registry.collector(
+    "cache_bytes", "gauge", "Bytes held by caches with a byte budget.", ("cache",),
+    lambda: [((name,), stats["bytes"]) for name, stats in _caches() if "bytes" in stats],
+)
+
+@router.get("/metrics")
+async def get_metrics(request: Request):
+    if METRICS_BEARER_TOKEN:
+        expected = f"Bearer {METRICS_BEARER_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            return JSONResponse(content={"message": "Invalid metrics token"}, status_code=401)
+    return Response(content=metrics_registry.render(), media_type=OPENMETRICS_MEDIA_TYPE)
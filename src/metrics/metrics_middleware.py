@@ -0,0 +1,103 @@
+import logging
+import os
+import time
+from metrics.metrics_context import RequestTiming, current_request_timing
+from metrics.metrics_store import REQUEST_METRICS, request_metrics
+from metrics.metrics_registry import http_requests, http_request_duration, metrics_registry
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Requests that match no route share one label, so unknown paths cannot grow the store.
+UNMATCHED_ROUTE = "<unmatched>"
+
+logger = logging.getLogger(__name__)
+
+def server_timing(timing: RequestTiming) -> str:
+    app_ms = (time.perf_counter() - timing.started) * 1000
+    return (
+        f'app;dur={app_ms:.2f}, '
+        f'db;dur={timing.db_time * 1000:.2f};desc="statements: {timing.statements}", '
+        f'ser;dur={timing.serialization_time * 1000:.2f}'
+    )
+
+def route_router(route) -> str:
+    # The router's tag (students, scores, ...); docs and other untagged routes are "other".
+    if route is None:
+        return UNMATCHED_ROUTE
+    tags = getattr(route, "tags", None)
+    return tags[0] if tags else "other"
+
+def record_http_request(scope, wall_time: float, status: int):
+    router = route_router(scope.get("route"))
+    http_requests.inc(router, scope["method"], str(status))
+    http_request_duration.observe(wall_time, router)
+    metrics_registry.maybe_flush()
+
+class RequestMetricsMiddleware:
+    """Times every HTTP request: wall time, SQL time and statement count (from
+    the engine hooks) and serialization time. Sends them in a Server-Timing
+    header, records them per route in request_metrics and logs the SQL of
+    requests slower than SLOW_REQUEST_MS. With REQUEST_METRICS off, only the
+    Prometheus http_* series are recorded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not REQUEST_METRICS:
+            await self.count_request(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_request_timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timing).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.finished = True
+            current_request_timing.reset(token)
+            wall_time = time.perf_counter() - timing.started
+            route = scope.get("route")
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+            request_metrics.observe(scope["method"], route_path, timing, wall_time, status)
+            record_http_request(scope, wall_time, status)
+            if wall_time * 1000 >= SLOW_REQUEST_MS:
+                log_slow_request(scope, route_path, timing, wall_time, status)
+
+    async def count_request(self, scope, receive, send):
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            record_http_request(scope, time.perf_counter() - started, status)
+
+def log_slow_request(scope, route_path: str, timing: RequestTiming, wall_time: float, status: int):
+    lines = [
+        f"Slow request {scope['method']} {scope['path']} ({route_path}) -> {status}: "
+        f"{wall_time * 1000:.1f} ms, db {timing.db_time * 1000:.1f} ms in {timing.statements} statements, "
+        f"serialization {timing.serialization_time * 1000:.1f} ms"
+    ]
+    lines += [f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())}" for statement, seconds in timing.sql]
+    if timing.statements > len(timing.sql):
+        lines.append(f"  ... {timing.statements - len(timing.sql)} more statements")
+    logger.warning("\n".join(lines))
@@ -0,0 +1,276 @@
+import bisect
+import fcntl
+import glob
+import json
+import math
+import os
+import time
+from common.process import process_alive
+
+# Directory shared by the uvicorn workers of one host. Unset: /metrics only
+# reports the worker that answers the scrape.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# Counter and histogram totals of workers that have exited, in METRICS_DIR
+EXITED_SNAPSHOT = "exited.json"
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> list:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self) -> list:
+        return [[list(labels), [list(counts), total]] for labels, (counts, total) in self.values.items()]
+
+class Collector:
+    """Values read when the registry is snapshotted, from stats the app already
+    keeps (pool counters, cache hit counts). collect() returns (labels, value) pairs."""
+
+    def __init__(self, name: str, type: str, documentation: str, labelnames: tuple, collect):
+        self.name = name
+        self.type = type
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def samples(self) -> list:
+        return [[list(labels), value] for labels, value in self.collect()]
+
+class MetricsRegistry:
+    """Per-worker metrics. Updates are plain dict operations on the event loop
+    thread, with no locks. With METRICS_DIR set, each worker writes a snapshot
+    there at most every METRICS_FLUSH_SECONDS and the scrape merges them: counters
+    and histograms are summed over every snapshot, and gauges get a pid label.
+    The snapshots of exited workers are folded into one EXITED_SNAPSHOT of their
+    totals and deleted, so totals never go backwards and the directory does not
+    grow with every restart."""
+
+    def __init__(self, directory: str | None = METRICS_DIR, flush_seconds: float = METRICS_FLUSH_SECONDS):
+        self.metrics: dict[str, Counter | Histogram | Collector] = {}
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.pid = os.getpid()
+        # Start time in the file name: a restarted worker reusing a pid does not
+        # overwrite the totals of the old one.
+        self.snapshot_name = f"{self.pid}-{time.time_ns()}.json"
+        self._next_flush = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, buckets: tuple, labelnames: tuple = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def collector(self, name: str, type: str, documentation: str, labelnames: tuple, collect) -> Collector:
+        return self.register(Collector(name, type, documentation, labelnames, collect))
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": metric.samples(),
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        _write_snapshot(os.path.join(self.directory, self.snapshot_name), self.snapshot())
+
+    def maybe_flush(self):
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self.flush_seconds
+            self.flush()
+
+    def _worker_snapshots(self) -> list[tuple[int, str]]:
+        """(pid, path) of the other workers' snapshots."""
+        paths = glob.glob(os.path.join(self.directory, "*-*.json"))
+        return [
+            (int(os.path.basename(path).split("-", 1)[0]), path)
+            for path in paths if os.path.basename(path) != self.snapshot_name
+        ]
+
+    def fold_exited(self):
+        """Add the snapshots of workers that are gone to EXITED_SNAPSHOT and
+        delete them. Workers fold under a file lock, so a snapshot is counted once."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        dead = [path for pid, path in self._worker_snapshots() if not process_alive(pid)]
+        if not dead:
+            return
+        exited_path = os.path.join(self.directory, EXITED_SNAPSHOT)
+        with open(os.path.join(self.directory, "exited.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exited = _read_snapshot(exited_path) or {}
+            folded = []
+            for path in dead:
+                # None when another worker folded it first.
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    _add_totals(exited, snapshot)
+                    folded.append(path)
+            if folded:
+                _write_snapshot(exited_path, exited)
+                for path in folded:
+                    os.remove(path)
+
+    def collect_workers(self) -> list[tuple[int | None, bool, dict]]:
+        """(pid, alive, snapshot) for every worker; this one is read live, and
+        the exited workers' totals come as one entry with pid None."""
+        workers = [(self.pid, True, self.snapshot())]
+        if self.directory is None:
+            return workers
+        self.fold_exited()
+        exited = _read_snapshot(os.path.join(self.directory, EXITED_SNAPSHOT))
+        if exited is not None:
+            workers.append((None, False, exited))
+        for pid, path in self._worker_snapshots():
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                workers.append((pid, process_alive(pid), snapshot))
+        return workers
+
+    def render(self) -> str:
+        """All workers merged into the OpenMetrics text format."""
+        families: dict[str, dict] = {}
+        for pid, alive, snapshot in self.collect_workers():
+            for name, metric in snapshot.items():
+                family = families.setdefault(name, {**metric, "values": {}})
+                values = family["values"]
+                for labels, value in metric["samples"]:
+                    if metric["type"] == "gauge":
+                        if not alive:
+                            continue
+                        values[tuple(labels) + (str(pid),)] = value
+                    else:
+                        _add_sample(values, metric["type"], tuple(labels), value)
+        lines = []
+        for name, family in families.items():
+            labelnames = family["labelnames"] + (["pid"] if family["type"] == "gauge" else [])
+            lines.append(f"# TYPE {name} {family['type']}")
+            lines.append(f"# HELP {name} {family['help']}")
+            for labels, value in family["values"].items():
+                label_pairs = list(zip(labelnames, labels))
+                if family["type"] == "counter":
+                    lines.append(f"{name}_total{_labels(label_pairs)} {_number(value)}")
+                elif family["type"] == "histogram":
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip(family["buckets"] + [math.inf], counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(label_pairs + [('le', _number(bound))])} {cumulative}")
+                    lines.append(f"{name}_count{_labels(label_pairs)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(label_pairs)} {_number(total)}")
+                else:
+                    lines.append(f"{name}{_labels(label_pairs)} {_number(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+def _add_sample(values: dict, type: str, labels: tuple, value):
+    if type == "histogram":
+        counts, total = values.get(labels, [[0] * len(value[0]), 0.0])
+        values[labels] = [[a + b for a, b in zip(counts, value[0])], total + value[1]]
+    else:
+        values[labels] = values.get(labels, 0.0) + value
+
+def _add_totals(totals: dict, snapshot: dict):
+    """Sum the counters and histograms of `snapshot` into `totals`; gauges of an
+    exited worker mean nothing and are dropped."""
+    for name, metric in snapshot.items():
+        if metric["type"] not in ("counter", "histogram"):
+            continue
+        family = totals.setdefault(name, {**metric, "samples": []})
+        values = {tuple(labels): value for labels, value in family["samples"]}
+        for labels, value in metric["samples"]:
+            _add_sample(values, metric["type"], tuple(labels), value)
+        family["samples"] = [[list(labels), value] for labels, value in values.items()]
+
+def _read_snapshot(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_snapshot(path: str, snapshot: dict):
+    # Written to a temporary file and renamed, so a scrape never reads half a snapshot.
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(path + ".tmp", path)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+metrics_registry = MetricsRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JWT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+PASSWORD_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+http_requests = metrics_registry.counter(
+    "http_requests", "HTTP requests by router, method and status.", ("router", "method", "status"))
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request wall time.", LATENCY_BUCKETS, ("router",))
+handled_exceptions = metrics_registry.counter(
+    "handled_exceptions", "Exceptions turned into error responses by handle_exception.", ("router", "exception"))
+jwt_verifications = metrics_registry.counter(
+    "jwt_verifications", "Access token checks by outcome: cache_hit, decoded or invalid.", ("result",))
+jwt_decode_duration = metrics_registry.histogram(
+    "jwt_decode_duration_seconds", "Time to decode and verify a token that was not cached.", JWT_BUCKETS)
+password_hash_duration = metrics_registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time per operation.", PASSWORD_HASH_BUCKETS, ("operation",))
+password_hash_queue_wait = metrics_registry.histogram(
+    "password_hash_queue_wait_seconds", "Time bcrypt jobs waited for a thread.", PASSWORD_HASH_BUCKETS, ("operation",))
+password_hash_rejected = metrics_registry.counter(
+    "password_hash_rejected", "bcrypt jobs refused because the queue was full.")
+
+def record_exception(router, e: Exception):
+    handled_exceptions.inc(router.tags[0], type(e).__name__)
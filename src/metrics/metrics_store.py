@@ -0,0 +1,103 @@
+import bisect
+import os
+from metrics.metrics_context import RequestTiming
+
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "True").lower() == "true"
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# Bucket upper bounds in seconds: 0.1 ms growing by 25% per bucket up to ~80 s,
+# so an interpolated percentile is within a quarter of the true value.
+BUCKET_BOUNDS = tuple(0.0001 * 1.25 ** i for i in range(62))
+
+class Histogram:
+    """Fixed-bucket latency histogram; constant memory however many samples."""
+
+    def __init__(self, bounds: tuple = BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+    def summary(self) -> dict:
+        # Milliseconds, rounded for display.
+        summary = {f"p{round(fraction * 100)}": _ms(self.percentile(fraction)) for fraction in PERCENTILES}
+        summary["mean"] = _ms(self.sum / self.count) if self.count else None
+        summary["max"] = _ms(self.max) if self.count else None
+        return summary
+
+class RouteMetrics:
+    def __init__(self):
+        self.wall = Histogram()
+        self.db = Histogram()
+        self.serialization = Histogram()
+        self.statements = 0
+        self.rows = 0
+        self.errors = 0
+
+    def observe(self, timing: RequestTiming, wall_time: float, status: int):
+        self.wall.observe(wall_time)
+        self.db.observe(timing.db_time)
+        self.serialization.observe(timing.serialization_time)
+        self.statements += timing.statements
+        self.rows += timing.rows
+        if status >= 500:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        count = self.wall.count
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "wall_ms": self.wall.summary(),
+            "db_ms": self.db.summary(),
+            "serialization_ms": self.serialization.summary(),
+            "statements_per_request": self.statements / count if count else None,
+            "rows_per_request": self.rows / count if count else None,
+        }
+
+class RequestMetricsStore:
+    """Per-route histograms for this worker, keyed by method and route template."""
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, timing: RequestTiming, wall_time: float, status: int):
+        key = (method, route)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        metrics.observe(timing, wall_time, status)
+
+    def stats(self) -> list[dict]:
+        return [
+            {"method": method, "route": route, **metrics.stats()}
+            for (method, route), metrics in sorted(self.routes.items(), key=lambda item: (item[0][1], item[0][0]))
+        ]
+
+    def clear(self):
+        self.routes.clear()
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+request_metrics = RequestMetricsStore()
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from guard.guard_service import RoleGuard
+from report.report_queue import ACTIVE_STATES, MEDIA_TYPES, report_queue
+from report.report_schema import ReportRequest
+from metrics.metrics_registry import record_exception
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"],
+    dependencies=[RoleGuard(["admin"])],
+    responses={404: {"description": "Not found"}},
+)
+
+async def handle_exception(e: Exception):
+    record_exception(router, e)
+    if isinstance(e, HTTPException):
+        return JSONResponse(content={"message": e.detail}, status_code=e.status_code)
+    else:
+        return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
+
+def get_job(job_id: str) -> dict:
+    status = report_queue.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return status
+
+@router.post("/")
+async def start_report(request: ReportRequest):
+    try:
+        status = await report_queue.submit(request)
+        return JSONResponse(content={"data": status}, status_code=202)
+    except Exception as e:
+        return await handle_exception(e)
+
+@router.get("/{job_id}")
+async def get_report(job_id: str):
+    try:
+        return JSONResponse(content={"data": get_job(job_id)}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
+@router.delete("/{job_id}")
+async def cancel_report(job_id: str):
+    """Cancels a queued or running report; deletes the status and output of a finished one."""
+    try:
+        status = get_job(job_id)
+        if status["state"] in ACTIVE_STATES:
+            report_queue.cancel(status)
+            return JSONResponse(content={"message": "Report cancellation requested"}, status_code=202)
+        report_queue.delete(status)
+        return JSONResponse(content={"message": "Report deleted successfully"}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
+@router.get("/{job_id}/download")
+async def download_report(job_id: str):
+    try:
+        status = get_job(job_id)
+        if status["state"] != "done":
+            raise HTTPException(status_code=409, detail=f"Report is {status['state']}")
+        return FileResponse(
+            report_queue.output_path(status),
+            media_type=MEDIA_TYPES[status["format"]],
+            filename=f"{status['type']}-{status['id']}.{status['format']}",
+        )
+    except Exception as e:
+        return await handle_exception(e)
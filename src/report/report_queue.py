@@ -0,0 +1,210 @@
+import asyncio
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from common.process import process_alive
+from database.database import ReadSessionLocal
+from report.report_repository import ReportRepository
+from report.report_schema import ReportRequest
+
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(tempfile.gettempdir(), "studentscoremanager-reports"))
+REPORT_MAX_RUNNING = int(os.getenv("REPORT_MAX_RUNNING", "2"))
+REPORT_CHUNK_ROWS = int(os.getenv("REPORT_CHUNK_ROWS", "1000"))
+REPORT_RETENTION_SECONDS = float(os.getenv("REPORT_RETENTION_SECONDS", "86400"))
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+ACTIVE_STATES = ("queued", "running")
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class ReportCancelled(Exception):
+    pass
+
+class ReportWriter:
+    """Appends row chunks to a CSV or NDJSON file. Called from a worker thread."""
+
+    def __init__(self, path: str, format: str, columns: list[str]):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.format = format
+        if format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=columns)
+            self.csv.writeheader()
+
+    def write(self, rows: list[dict]):
+        if self.format == "csv":
+            self.csv.writerows(rows)
+        else:
+            self.file.write("".join(json.dumps(row, default=str) + "\n" for row in rows))
+
+    def close(self):
+        self.file.close()
+
+class ReportQueue:
+    """Report jobs run as asyncio tasks in the worker that accepted them, at most
+    max_running at a time; the rest wait as "queued". There is no broker: each
+    job keeps its status in <id>.json next to its output in REPORT_DIR, so every
+    worker on the host can poll, cancel (through an <id>.cancel marker checked
+    between chunks) and download it."""
+
+    def __init__(self, directory: str, max_running: int, chunk_rows: int, session_factory=ReadSessionLocal):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.session_factory = session_factory
+        self._slots = asyncio.Semaphore(max_running)
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, job_id + suffix)
+
+    def output_path(self, status: dict) -> str:
+        return self._path(status["id"], "." + status["format"])
+
+    def _save(self, status: dict):
+        # Written to a temporary file and renamed, so a poll never reads half a status.
+        path = self._path(status["id"], ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(path + ".tmp", path)
+
+    def _remove(self, job_id: str, *suffixes: str):
+        for suffix in suffixes:
+            _discard(self._path(job_id, suffix))
+
+    def get(self, job_id: str) -> dict | None:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id, ".json"), encoding="utf-8") as f:
+                status = json.load(f)
+        except FileNotFoundError:
+            return None
+        if status["state"] in ACTIVE_STATES and not process_alive(status["pid"]):
+            # The worker that owned the job exited before finishing it.
+            status.update(state="failed", error="Report worker exited", finished_at=time.time())
+            self._save(status)
+        return status
+
+    def purge_expired(self, retention_seconds: float = REPORT_RETENTION_SECONDS):
+        cutoff = time.time() - retention_seconds
+        for name in os.listdir(self.directory):
+            job_id, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            status = self.get(job_id)
+            if status and status["finished_at"] and status["finished_at"] < cutoff:
+                self.delete(status)
+
+    async def submit(self, request: ReportRequest) -> dict:
+        await asyncio.to_thread(os.makedirs, self.directory, exist_ok=True)
+        # Lists REPORT_DIR and reads every status file.
+        await asyncio.to_thread(self.purge_expired)
+        status = {
+            "id": uuid.uuid4().hex,
+            "type": request.type,
+            "format": request.format,
+            "params": request.model_dump(mode="json", exclude={"type", "format"}, exclude_none=True),
+            "state": "queued",
+            "rows_written": 0,
+            "rows_total": None,
+            "progress": 0.0,
+            "size_bytes": None,
+            "error": None,
+            "pid": os.getpid(),
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await asyncio.to_thread(self._save, status)
+        task = asyncio.create_task(self._run(status, request))
+        self._tasks[status["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(status["id"], None))
+        return status
+
+    def cancel(self, status: dict):
+        """Ask an active job to stop. A job owned by this worker is cancelled right
+        away; one owned by another worker stops at its next chunk."""
+        open(self._path(status["id"], ".cancel"), "w").close()
+        task = self._tasks.get(status["id"])
+        if task is not None:
+            task.cancel()
+
+    def delete(self, status: dict):
+        self._remove(status["id"], "." + status["format"], ".json", ".cancel")
+
+    async def _check_cancelled(self, job_id: str):
+        # Jobs of this worker are cancelled through their task; the marker is for
+        # the other workers. Checked in a thread so a slow disk cannot stall the loop.
+        if await asyncio.to_thread(os.path.exists, self._path(job_id, ".cancel")):
+            raise ReportCancelled()
+
+    async def _run(self, status: dict, request: ReportRequest):
+        job_id = status["id"]
+        partial = self.output_path(status) + ".part"
+        writer = None
+        in_flight = set()
+
+        async def off_loop(func, *args):
+            # File work runs in a thread and is shielded: cancelling the job does
+            # not abandon a write or status save halfway, cleanup waits for it.
+            future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            in_flight.add(future)
+            future.add_done_callback(in_flight.discard)
+            return await asyncio.shield(future)
+
+        try:
+            async with self._slots:
+                await self._check_cancelled(job_id)
+                status.update(state="running", started_at=time.time())
+                # Copies: the status keeps changing on the loop while a thread saves it.
+                await off_loop(self._save, dict(status))
+                async with self.session_factory() as db:
+                    repository = ReportRepository(db)
+                    status["rows_total"] = await repository.count(request)
+                    await off_loop(self._save, dict(status))
+                    writer = await off_loop(ReportWriter, partial, request.format, repository.columns(request))
+                    async for rows in repository.stream_chunks(request, self.chunk_rows):
+                        await self._check_cancelled(job_id)
+                        await off_loop(writer.write, rows)
+                        status["rows_written"] += len(rows)
+                        # Rows written while the job runs can push rows_written past the count.
+                        status["progress"] = min(status["rows_written"] / (status["rows_total"] or 1), 1.0)
+                        await off_loop(self._save, dict(status))
+                await off_loop(writer.close)
+                writer = None
+                size = await off_loop(_publish, partial, self.output_path(status))
+                status.update(state="done", progress=1.0, finished_at=time.time(), size_bytes=size)
+                await off_loop(self._save, dict(status))
+        except (ReportCancelled, asyncio.CancelledError):
+            status.update(state="cancelled", finished_at=time.time())
+        except Exception as e:
+            status.update(state="failed", error=str(e), finished_at=time.time())
+        finally:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            if writer is not None:
+                await asyncio.to_thread(writer.close)
+            if status["state"] != "done":
+                await asyncio.to_thread(_discard, partial)
+                await asyncio.to_thread(self._save, status)
+            await asyncio.to_thread(self._remove, job_id, ".cancel")
+
+    async def shutdown(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def _publish(partial: str, path: str) -> int:
+    """Move the finished output into place; returns its size."""
+    os.replace(partial, path)
+    return os.path.getsize(path)
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+report_queue = ReportQueue(REPORT_DIR, REPORT_MAX_RUNNING, REPORT_CHUNK_ROWS)
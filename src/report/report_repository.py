@@ -0,0 +1,64 @@
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from report.report_schema import ReportRequest
+from score.score_model import Score
+from student.student_model import Student
+from subject.subject_model import Subject
+
+class ReportRepository:
+    """Row sources for the report jobs. Rows are streamed with yield_per, so a
+    report never holds more than one chunk of the result in memory."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _score_filters(self, request: ReportRequest):
+        filters = []
+        if request.subject_id is not None:
+            filters.append(Score.subject_id == request.subject_id)
+        if request.date_from is not None:
+            filters.append(Score.date >= request.date_from)
+        if request.date_to is not None:
+            filters.append(Score.date <= request.date_to)
+        return filters
+
+    def _scores_query(self, request: ReportRequest):
+        query = select(Score.score_id, Score.student_id, Score.subject_id, Score.score, Score.date)
+        if request.class_ is not None:
+            query = query.join(Student, Student.student_id == Score.student_id).filter(Student.class_ == request.class_)
+        return query.filter(*self._score_filters(request)).order_by(Score.score_id)
+
+    def _transcripts_query(self, request: ReportRequest):
+        # The score filters go in the join condition: a student with no matching
+        # scores still gets one row with empty score columns.
+        query = (
+            select(
+                Student.student_id, Student.name, Student.class_,
+                Subject.subject_id, Subject.name.label("subject_name"),
+                Score.score_id, Score.score, Score.date,
+            )
+            .select_from(Student)
+            .outerjoin(Score, and_(Score.student_id == Student.student_id, *self._score_filters(request)))
+            .outerjoin(Subject, Subject.subject_id == Score.subject_id)
+        )
+        if request.class_ is not None:
+            query = query.filter(Student.class_ == request.class_)
+        return query.order_by(Student.student_id, Subject.subject_id, Score.score_id)
+
+    def _query(self, request: ReportRequest):
+        if request.type == "transcripts":
+            return self._transcripts_query(request)
+        return self._scores_query(request)
+
+    async def count(self, request: ReportRequest) -> int:
+        query = self._query(request).order_by(None).subquery()
+        result = await self.db.execute(select(func.count()).select_from(query))
+        return result.scalar_one()
+
+    async def stream_chunks(self, request: ReportRequest, chunk_size: int):
+        result = await self.db.stream(self._query(request), execution_options={"yield_per": chunk_size})
+        async for rows in result.mappings().partitions(chunk_size):
+            yield [dict(row) for row in rows]
+
+    def columns(self, request: ReportRequest) -> list[str]:
+        return list(self._query(request).selected_columns.keys())
@@ -0,0 +1,13 @@
+import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+class ReportRequest(BaseModel):
+    # scores: one row per score. transcripts: every student with their scores
+    # and subject names, students without scores included.
+    type: Literal["scores", "transcripts"]
+    format: Literal["csv", "ndjson"] = "csv"
+    subject_id: Optional[int] = None
+    class_: Optional[str] = None
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
@@ -0,0 +1,46 @@
+"""Maintenance for the score aggregate tables.
+
+Run from the src directory:
+    python -m score.score_aggregate_command check
+    python -m score.score_aggregate_command rebuild
+
+A rebuild invalidates the response caches of app workers on this host through
+the shared CACHE_VERSION_FILE.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from database.database import AsyncSessionLocal, close_db
+from cache.table_versions import table_versions
+from score.score_aggregate_repository import ScoreAggregateRepository
+# Register the mappers the Score relationships refer to.
+from student.student_model import Student
+from subject.subject_model import Subject
+
+async def run(command: str) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            repository = ScoreAggregateRepository(db)
+            if command == "rebuild":
+                await repository.rebuild()
+                await db.commit()
+                table_versions.bump("score")
+                print("Score aggregates rebuilt")
+                return 0
+            mismatches = await repository.check()
+            for mismatch in mismatches:
+                print(json.dumps(mismatch, default=str))
+            print(f"{len(mismatches)} mismatched aggregate row(s)")
+            return 1 if mismatches else 0
+    finally:
+        await close_db()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.command)))
+
+if __name__ == "__main__":
+    main()
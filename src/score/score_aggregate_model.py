@@ -0,0 +1,27 @@
+from sqlalchemy import Integer, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from database.database import Base
+
+# Running totals over the score table, maintained by ScoreAggregateRepository in
+# the same transaction as every score write. No foreign keys, so the rows can
+# be rebuilt independently of student/subject deletes.
+
+class StudentScoreAggregate(Base):
+    __tablename__ = "student_score_aggregate"
+
+    student_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    score_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    score_sum_sq: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    score_min: Mapped[float] = mapped_column(Float, nullable=True)
+    score_max: Mapped[float] = mapped_column(Float, nullable=True)
+
+class SubjectScoreAggregate(Base):
+    __tablename__ = "subject_score_aggregate"
+
+    subject_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    score_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    score_sum_sq: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    score_min: Mapped[float] = mapped_column(Float, nullable=True)
+    score_max: Mapped[float] = mapped_column(Float, nullable=True)
@@ -0,0 +1,149 @@
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database_upsert import greatest, least, upsert_statement
+from score.score_aggregate_model import StudentScoreAggregate, SubjectScoreAggregate
+from score.score_model import Score
+
+AGGREGATES = ((StudentScoreAggregate, "student_id"), (SubjectScoreAggregate, "subject_id"))
+STAT_COLUMNS = ("score_count", "score_sum", "score_sum_sq", "score_min", "score_max")
+# Sums are floats, so a rebuilt value may differ from the running one in the last bits.
+CHECK_TOLERANCE = 1e-6
+
+_subject_table = SubjectScoreAggregate.__table__
+ALL_SUBJECT_STATS = select(_subject_table.c.subject_id, *(_subject_table.c[column] for column in STAT_COLUMNS)).filter(
+    _subject_table.c.score_count > 0
+).order_by(_subject_table.c.subject_id)
+
+def group_deltas(scores: list[tuple], key: str) -> list[dict]:
+    """Fold (student_id, subject_id, score) tuples into per-group deltas.
+    NULL scores are ignored, like AVG() ignores them."""
+    index = 0 if key == "student_id" else 1
+    groups = {}
+    for row in scores:
+        value = row[2]
+        if value is None:
+            continue
+        group = groups.get(row[index])
+        if group is None:
+            groups[row[index]] = {key: row[index], "score_count": 1, "score_sum": value, "score_sum_sq": value * value, "score_min": value, "score_max": value}
+        else:
+            group["score_count"] += 1
+            group["score_sum"] += value
+            group["score_sum_sq"] += value * value
+            group["score_min"] = min(group["score_min"], value)
+            group["score_max"] = max(group["score_max"], value)
+    return list(groups.values())
+
+def computed_stats(key: str):
+    group = getattr(Score, key)
+    return select(
+        group.label(key),
+        func.count(Score.score).label("score_count"),
+        func.coalesce(func.sum(Score.score), 0).label("score_sum"),
+        func.coalesce(func.sum(Score.score * Score.score), 0).label("score_sum_sq"),
+        func.min(Score.score).label("score_min"),
+        func.max(Score.score).label("score_max"),
+    ).group_by(group)
+
+class ScoreAggregateRepository:
+    """Keeps student_score_aggregate and subject_score_aggregate in step with
+    the score table. Callers run these inside the transaction that writes the
+    scores and commit afterwards."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _dialect_name(self):
+        return self.db.get_bind().dialect.name
+
+    async def add_scores(self, scores: list[tuple]):
+        dialect_name = self._dialect_name()
+        for model, key in AGGREGATES:
+            rows = group_deltas(scores, key)
+            if not rows:
+                continue
+            table = model.__table__
+            stmt = upsert_statement(dialect_name, table, key, lambda incoming: {
+                "score_count": table.c.score_count + incoming["score_count"],
+                "score_sum": table.c.score_sum + incoming["score_sum"],
+                "score_sum_sq": table.c.score_sum_sq + incoming["score_sum_sq"],
+                "score_min": least(dialect_name, func.coalesce(table.c.score_min, incoming["score_min"]), incoming["score_min"]),
+                "score_max": greatest(dialect_name, func.coalesce(table.c.score_max, incoming["score_max"]), incoming["score_max"]),
+            })
+            await self.db.execute(stmt, rows)
+
+    async def remove_scores(self, scores: list[tuple]):
+        # Counts and sums are decremented; min/max cannot be, so they are read
+        # back from the (group, score) index, which is a single index seek.
+        score = Score.__table__
+        for model, key in AGGREGATES:
+            rows = group_deltas(scores, key)
+            if not rows:
+                continue
+            table = model.__table__
+            stmt = (
+                update(table)
+                .where(table.c[key] == bindparam("b_key"))
+                .values(
+                    score_count=table.c.score_count - bindparam("b_count"),
+                    score_sum=table.c.score_sum - bindparam("b_sum"),
+                    score_sum_sq=table.c.score_sum_sq - bindparam("b_sum_sq"),
+                    score_min=select(func.min(score.c.score)).where(score.c[key] == table.c[key]).scalar_subquery(),
+                    score_max=select(func.max(score.c.score)).where(score.c[key] == table.c[key]).scalar_subquery(),
+                )
+            )
+            await self.db.execute(stmt, [
+                {"b_key": row[key], "b_count": row["score_count"], "b_sum": row["score_sum"], "b_sum_sq": row["score_sum_sq"]}
+                for row in rows
+            ])
+
+    async def recompute_groups(self, student_ids=(), subject_ids=()):
+        """Rebuild the given groups from the score table, e.g. after a student
+        or subject was deleted together with its scores."""
+        for (model, key), ids in zip(AGGREGATES, (list(student_ids), list(subject_ids))):
+            if not ids:
+                continue
+            table = model.__table__
+            await self.db.execute(delete(table).where(table.c[key].in_(ids)))
+            await self.db.execute(
+                table.insert().from_select(
+                    [key, *STAT_COLUMNS],
+                    computed_stats(key).where(getattr(Score, key).in_(ids)),
+                )
+            )
+
+    async def rebuild(self):
+        for model, key in AGGREGATES:
+            table = model.__table__
+            await self.db.execute(delete(table))
+            await self.db.execute(table.insert().from_select([key, *STAT_COLUMNS], computed_stats(key)))
+
+    async def check(self):
+        """Compare the stored aggregates with a fresh GROUP BY over score."""
+        mismatches = []
+        for model, key in AGGREGATES:
+            table = model.__table__
+            stored = {row[key]: row for row in (await self.db.execute(select(table).where(table.c.score_count > 0))).mappings()}
+            computed = {row[key]: row for row in (await self.db.execute(computed_stats(key).having(func.count(Score.score) > 0))).mappings()}
+            for group in stored.keys() | computed.keys():
+                expected, actual = computed.get(group), stored.get(group)
+                if expected is None or actual is None or any(
+                    not _close(expected[column], actual[column]) for column in STAT_COLUMNS
+                ):
+                    mismatches.append({
+                        "table": table.name,
+                        key: group,
+                        "expected": dict(expected) if expected else None,
+                        "stored": dict(actual) if actual else None,
+                    })
+        return mismatches
+
+    # Returns Row tuples (attribute access, no entity state).
+    async def get_all_subject_stats(self):
+        result = await self.db.execute(ALL_SUBJECT_STATS)
+        return result.all()
+
+def _close(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= CHECK_TOLERANCE * max(1.0, abs(a), abs(b))
@@ -0,0 +1,109 @@
+import math
+from sqlalchemy import Integer, case, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from score.score_repository import score_source
+from score.score_schema import ScoreAnalyticsFilter
+from student.student_model import Student
+
+def floor(dialect_name: str, expr):
+    # SQLite only has FLOOR when built with the math functions; CAST truncates
+    # there (but rounds on MySQL), so correct it for negative values.
+    if dialect_name == "sqlite":
+        truncated = cast(expr, Integer)
+        return truncated - case((expr < truncated, 1), else_=0)
+    return func.floor(expr)
+
+def interpolate(values: dict, count: int, fraction: float):
+    """Linear-interpolated percentile from the 1-based ranks fetched around it."""
+    position = (count - 1) * fraction
+    lower = math.floor(position)
+    low = values[lower + 1]
+    high = values.get(lower + 2, low)
+    return low + (high - low) * (position - lower)
+
+class ScoreAnalyticsRepository:
+    """Distribution statistics computed in the database; only per-group
+    results (and a few rows around each percentile) are transferred. With
+    include_archive the archived scores are part of every group."""
+
+    def __init__(self, db: AsyncSession, include_archive: bool = False):
+        self.db = db
+        self.scores = score_source(include_archive)
+
+    def _dialect_name(self):
+        return self.db.get_bind().dialect.name
+
+    def _group_column(self, group_by: str):
+        # None means one group over every matching score.
+        return {"subject": self.scores.c.subject_id, "class": Student.class_, "none": None}[group_by]
+
+    def _scoped(self, query, group_by: str, filters: ScoreAnalyticsFilter):
+        scores = self.scores
+        query = query.select_from(scores).filter(scores.c.score.is_not(None))
+        if group_by == "class" or filters.class_ is not None:
+            query = query.join(Student, Student.student_id == scores.c.student_id)
+        if filters.subject_id is not None:
+            query = query.filter(scores.c.subject_id == filters.subject_id)
+        if filters.class_ is not None:
+            query = query.filter(Student.class_ == filters.class_)
+        return query.filter(*filters.conditions(scores.c.date))
+
+    def _grouped(self, columns: list, group_by: str, filters: ScoreAnalyticsFilter, *extra_group_by):
+        group = self._group_column(group_by)
+        group_columns = [group] if group is not None else []
+        query = self._scoped(select(*(column.label("group") for column in group_columns), *columns), group_by, filters)
+        if group_columns or extra_group_by:
+            query = query.group_by(*group_columns, *extra_group_by)
+        return query
+
+    async def get_summary(self, group_by: str, filters: ScoreAnalyticsFilter):
+        score = self.scores.c.score
+        query = self._grouped([
+            func.count(score).label("count"),
+            func.sum(score).label("sum"),
+            func.sum(score * score).label("sum_sq"),
+            func.min(score).label("min"),
+            func.max(score).label("max"),
+        ], group_by, filters)
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def get_histogram(self, group_by: str, filters: ScoreAnalyticsFilter, bin_width: float):
+        bucket = floor(self._dialect_name(), self.scores.c.score / bin_width)
+        query = self._grouped([bucket.label("bucket"), func.count().label("count")], group_by, filters, bucket)
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def get_percentiles(self, group_by: str, filters: ScoreAnalyticsFilter, fractions: list[float]):
+        """{group: {fraction: value}}. Ranks are numbered with window functions and
+        only the rows next to each requested percentile are returned."""
+        if not fractions:
+            return {}
+        group = self._group_column(group_by)
+        score = self.scores.c.score
+        partition = [group] if group is not None else None
+        columns = [
+            score.label("score"),
+            func.row_number().over(partition_by=partition, order_by=score).label("rank"),
+            func.count().over(partition_by=partition).label("count"),
+        ]
+        if group is not None:
+            columns.insert(0, group.label("group"))
+        ranked = self._scoped(select(*columns), group_by, filters).subquery()
+        dialect_name = self._dialect_name()
+        # One rank of slack below the interpolation pair absorbs floor() rounding
+        # differences between the database and Python.
+        near = []
+        for fraction in fractions:
+            lower = floor(dialect_name, (ranked.c["count"] - 1) * fraction)
+            near.append(ranked.c["rank"].between(lower, lower + 2))
+        query = select(ranked).where(or_(*near))
+        values, counts = {}, {}
+        for row in (await self.db.execute(query)).mappings():
+            key = row["group"] if group is not None else None
+            values.setdefault(key, {})[row["rank"]] = row["score"]
+            counts[key] = row["count"]
+        return {
+            key: {fraction: interpolate(values[key], counts[key], fraction) for fraction in fractions}
+            for key in values
+        }
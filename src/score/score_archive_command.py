@@ -0,0 +1,57 @@
+"""Archival of closed terms (see score_term for how terms are defined).
+
+Run from the src directory:
+    python -m score.score_archive_command list
+    python -m score.score_archive_command archive 2024-1
+    python -m score.score_archive_command restore 2024-1
+
+Response caches of app workers on this host are invalidated through the
+shared CACHE_VERSION_FILE.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from database.database import AsyncSessionLocal, close_db
+from cache.table_versions import table_versions
+from score.score_archive_repository import ScoreArchiveRepository
+from score.score_term import TERM_PATTERN
+# Register the mappers the Score relationships refer to.
+from student.student_model import Student
+from subject.subject_model import Subject
+
+async def run(command: str, term: str | None) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            repository = ScoreArchiveRepository(db)
+            if command == "list":
+                for row in await repository.list_terms():
+                    print(json.dumps(row, default=str))
+                return 0
+            try:
+                if command == "archive":
+                    moved = await repository.archive_term(term)
+                else:
+                    moved = await repository.restore_term(term)
+            except ValueError as e:
+                print(e)
+                return 1
+            await db.commit()
+            table_versions.bump("score")
+            print(f"{'Archived' if command == 'archive' else 'Restored'} {moved} score(s) of term {term}")
+            return 0
+    finally:
+        await close_db()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["list", "archive", "restore"])
+    parser.add_argument("term", nargs="?", help="e.g. 2024-1; required for archive and restore")
+    args = parser.parse_args()
+    if args.command != "list" and (args.term is None or not re.match(TERM_PATTERN, args.term)):
+        parser.error("archive and restore need a term such as 2024-1")
+    sys.exit(asyncio.run(run(args.command, args.term)))
+
+if __name__ == "__main__":
+    main()
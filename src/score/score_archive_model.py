@@ -0,0 +1,25 @@
+from sqlalchemy import Integer, Date, DateTime, Float, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+from database.database import Base
+
+# Scores of closed terms, moved out of score by ScoreArchiveRepository. Same
+# columns plus the term they were archived under. No foreign keys: student and
+# subject deletes remove the archived rows themselves.
+
+class ScoreArchive(Base):
+    __tablename__ = "score_archive"
+    # Created by migration v005_score_archive
+    __table_args__ = (
+        Index("ix_score_archive_term", "term"),
+        Index("ix_score_archive_student_id_score", "student_id", "score"),
+        Index("ix_score_archive_subject_id_score", "subject_id", "score"),
+        Index("ix_score_archive_date", "date"),
+    )
+
+    score_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    student_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    subject_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[float] = mapped_column(Float)
+    date: Mapped[str] = mapped_column(Date)
+    term: Mapped[str] = mapped_column(String(16), nullable=False)
+    archived_at: Mapped[str] = mapped_column(DateTime, nullable=False)
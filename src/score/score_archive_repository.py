@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from score.score_aggregate_repository import ScoreAggregateRepository
+from score.score_archive_model import ScoreArchive
+from score.score_model import Score
+from score.score_repository import ARCHIVED_COLUMNS
+from score.score_term import is_closed, term_range
+
+# recompute_groups takes the ids as an IN list; SQLite limits the bound parameters.
+RECOMPUTE_CHUNK = 1000
+
+_score_table = Score.__table__
+_archive_table = ScoreArchive.__table__
+
+class ScoreArchiveRepository:
+    """Moves the scores of a closed term from score to score_archive and back.
+    A move is one INSERT ... SELECT and one DELETE; the aggregates of the
+    students and subjects involved are then recomputed from what is left in
+    score. Callers commit afterwards."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.aggregates = ScoreAggregateRepository(db)
+
+    async def list_terms(self) -> list[dict]:
+        result = await self.db.execute(
+            select(
+                _archive_table.c.term,
+                func.count().label("scores"),
+                func.min(_archive_table.c.date).label("date_from"),
+                func.max(_archive_table.c.date).label("date_to"),
+                func.max(_archive_table.c.archived_at).label("archived_at"),
+            ).group_by(_archive_table.c.term).order_by(_archive_table.c.term)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def _groups(self, table, condition) -> tuple[set, set]:
+        student_ids = set((await self.db.execute(select(table.c.student_id).where(condition).distinct())).scalars())
+        subject_ids = set((await self.db.execute(select(table.c.subject_id).where(condition).distinct())).scalars())
+        return student_ids, subject_ids
+
+    async def _recompute(self, student_ids: set, subject_ids: set):
+        student_ids, subject_ids = sorted(student_ids), sorted(subject_ids)
+        for start in range(0, max(len(student_ids), len(subject_ids)), RECOMPUTE_CHUNK):
+            await self.aggregates.recompute_groups(
+                student_ids[start:start + RECOMPUTE_CHUNK], subject_ids[start:start + RECOMPUTE_CHUNK]
+            )
+
+    async def archive_term(self, term: str) -> int:
+        """Move the term's scores to score_archive; returns how many moved."""
+        if not is_closed(term):
+            raise ValueError(f"Term {term} is not closed yet.")
+        date_from, date_to = term_range(term)
+        in_term = _score_table.c.date.between(date_from, date_to)
+        student_ids, subject_ids = await self._groups(_score_table, in_term)
+        if not student_ids:
+            return 0
+        await self.db.execute(_archive_table.insert().from_select(
+            [*ARCHIVED_COLUMNS, "term", "archived_at"],
+            select(
+                *(_score_table.c[column] for column in ARCHIVED_COLUMNS),
+                literal(term, _archive_table.c.term.type),
+                literal(datetime.now(timezone.utc), _archive_table.c.archived_at.type),
+            ).where(in_term),
+        ))
+        result = await self.db.execute(delete(_score_table).where(in_term))
+        await self._recompute(student_ids, subject_ids)
+        return result.rowcount
+
+    async def restore_term(self, term: str) -> int:
+        """Move the term's archived scores back to score; returns how many moved."""
+        in_term = _archive_table.c.term == term
+        student_ids, subject_ids = await self._groups(_archive_table, in_term)
+        if not student_ids:
+            return 0
+        await self.db.execute(_score_table.insert().from_select(
+            list(ARCHIVED_COLUMNS),
+            select(*(_archive_table.c[column] for column in ARCHIVED_COLUMNS)).where(in_term),
+        ))
+        result = await self.db.execute(delete(_archive_table).where(in_term))
+        await self._recompute(student_ids, subject_ids)
+        return result.rowcount
+
+    async def delete_by(self, key: str, value: int):
+        """Drop the archived scores of a deleted student or subject."""
+        await self.db.execute(delete(_archive_table).where(_archive_table.c[key] == value))
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import datetime
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from score.score_service import ScoreService
-from database.database import get_db
-from score.score_schema import ScoreSchema, StudentScoreSchema
+from database.database import get_db, get_read_db
+from score.score_schema import ScoreSchema, ScoreAnalyticsFilter, ScoreDateFilter, score_row_adapter, score_rows_adapter, subject_avg_score_rows_adapter
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import SQLAlchemyError
 from guard.guard_service import RoleGuard
+from cache.response_cache import cached_response
+from common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ndjson_response
+from common.serialization import data_response
+from metrics.metrics_registry import record_exception
+from score.score_term import TERM_PATTERN, date_bounds
 
 router = APIRouter(
     prefix="/api/scores",
@@ -15,8 +24,11 @@ router = APIRouter(
 )
 
 ANYROLE = ["admin", "user"]
+MAX_IMPORT_BATCH_SIZE = 10000
+MAX_LEADERBOARD_K = 1000
 
-def handle_exception(e: Exception):
+async def handle_exception(e: Exception):
+    record_exception(router, e)
     if isinstance(e, HTTPException):
         return JSONResponse(content={"message": e.detail}, status_code=e.status_code)
     elif isinstance(e, SQLAlchemyError):
@@ -24,35 +36,67 @@ def handle_exception(e: Exception):
     else:
         return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
 
+def score_date_filter(
+    date_from: datetime.date | None = Query(None, alias="from"),
+    date_to: datetime.date | None = Query(None, alias="to"),
+    term: str | None = Query(None, pattern=TERM_PATTERN),
+) -> ScoreDateFilter | None:
+    """Optional from/to dates and term (e.g. 2024-1, see TERM_START_MONTHS) of the
+    score reads. Given together, the term is narrowed by from/to."""
+    if date_from is None and date_to is None and term is None:
+        return None
+    date_from, date_to = date_bounds(date_from, date_to, term)
+    return ScoreDateFilter(date_from=date_from, date_to=date_to)
+
 @router.get("/student/{student_id}/{isAscending}", dependencies=[RoleGuard(ANYROLE)])
-async def get_student_scores(student_id: int, isAscending: bool = True, db: AsyncSession = Depends(get_db)):
+@cached_response("score", "student")
+async def get_student_scores(
+    student_id: int,
+    isAscending: bool = True,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
         if student_id is None:
             raise HTTPException(status_code=400, detail="Student ID is required")
         score_service = ScoreService(db)
-        scores = await score_service.get_student_scores(student_id, isAscending)
-        result = [ScoreSchema.model_validate(score) for score in scores]
-        return JSONResponse(content={"data": jsonable_encoder(result)}, status_code=200)
+        scores = await score_service.get_student_scores(student_id, isAscending, dates)
+        return data_response(score_rows_adapter, scores)
     except Exception as e:
         return await handle_exception(e)
     
 @router.get("/list", dependencies=[RoleGuard(ANYROLE)])
-async def get_all_scores(db: AsyncSession = Depends(get_db)):
+@cached_response("score")
+async def get_all_scores(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    stream: bool = False,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
+        if stream:
+            return ndjson_response(request, lambda session: ScoreService(session).stream_all_scores(dates), score_row_adapter)
         score_service = ScoreService(db)
-        scores = await score_service.get_all_scores()
-        result = [ScoreSchema.model_validate(score) for score in scores]
-        return JSONResponse(content={"data": jsonable_encoder(result)}, status_code=200)
+        scores, next_cursor = await score_service.get_scores_page(limit, after, dates)
+        return data_response(score_rows_adapter, scores, next_cursor=next_cursor)
     except Exception as e:
         return await handle_exception(e)
     
 @router.get("/avg/{student_id}", dependencies=[RoleGuard(ANYROLE)])
-async def get_avg_score(student_id: int, db: AsyncSession = Depends(get_db)):
+@cached_response("score", "student")
+async def get_avg_score(
+    student_id: int,
+    include_archive: bool = False,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
         if student_id is None:
             raise HTTPException(status_code=400, detail="Student ID is required")
         score_service = ScoreService(db)
-        avg_score = await score_service.get_student_avg_score(student_id)
+        avg_score = await score_service.get_student_avg_score(student_id, dates, include_archive)
         if avg_score is None:
             raise HTTPException(status_code=404, detail="No scores found for this student")
         return JSONResponse(content={"data": avg_score}, status_code=200)
@@ -75,6 +119,35 @@ async def add_score(score_data: ScoreSchema, db: AsyncSession = Depends(get_db))
     except Exception as e:
         return await handle_exception(e)
 
+async def parse_import_rows(request: Request) -> list[dict]:
+    body = await request.body()
+    if "csv" in request.headers.get("content-type", ""):
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        # Empty cells mean "not given" so the schema defaults apply.
+        return [{key: value for key, value in row.items() if value not in ("", None)} for row in reader]
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of score objects")
+    return rows
+
+@router.post("/import", dependencies=[RoleGuard(["admin"])])
+async def import_scores(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        rows = await parse_import_rows(request)
+        score_service = ScoreService(db)
+        report = await score_service.import_scores(rows, batch_size)
+        status_code = 201 if report["inserted"] else 400
+        return JSONResponse(content={"message": f"Imported {report['inserted']} of {len(rows)} scores", "data": report}, status_code=status_code)
+    except Exception as e:
+        return await handle_exception(e)
+
 @router.delete("/remove/{score_id}", dependencies=[RoleGuard(["admin"])])
 async def remove_score(score_id: int, db: AsyncSession = Depends(get_db)):
     try:
@@ -103,25 +176,85 @@ async def update_score(score_id: int, score_data: ScoreSchema, db: AsyncSession
         return await handle_exception(e)
     
 @router.get("/top/{limit}", dependencies=[RoleGuard(ANYROLE)])
-async def get_top_scores(limit: int = 10, db: AsyncSession = Depends(get_db)):
+@cached_response("score")
+async def get_top_scores(
+    limit: int = 10,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
         score_service = ScoreService(db)
-        scores = await score_service.get_top_scores(limit)
+        scores = await score_service.get_top_scores(limit, dates)
         if scores is None:
             raise HTTPException(status_code=404, detail="No scores found")
-        result = [ScoreSchema.model_validate(score) for score in scores]
-        return JSONResponse(content={"data": jsonable_encoder(result)}, status_code=200)
+        return data_response(score_rows_adapter, scores)
     except Exception as e:
         return await handle_exception(e)
     
 @router.get("/avg_all", dependencies=[RoleGuard(ANYROLE)])
-async def calculate_all_avg_scores(db: AsyncSession = Depends(get_db)):
+@cached_response("score")
+async def calculate_all_avg_scores(
+    include_archive: bool = False,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
         score_service = ScoreService(db)
-        avg_scores = await score_service.calculate_all_avg_scores()
+        avg_scores = await score_service.calculate_all_avg_scores(dates, include_archive)
         if avg_scores is None:
             raise HTTPException(status_code=404, detail="No scores found")
-        result = [StudentScoreSchema.model_validate(score) for score in avg_scores]
-        return JSONResponse(content={"data": jsonable_encoder(result)}, status_code=200)
+        return data_response(subject_avg_score_rows_adapter, avg_scores)
     except Exception as e:
         return await handle_exception(e)
+
+@router.get("/analytics", dependencies=[RoleGuard(ANYROLE)])
+@cached_response("score", "student")
+async def get_score_analytics(
+    group_by: str = Query("subject", pattern="^(subject|class|none)$"),
+    subject_id: int | None = None,
+    class_: str | None = None,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    include_archive: bool = False,
+    percentiles: str = "25,50,75,90",
+    bin_width: float = Query(1.0, gt=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        try:
+            points = [float(point) for point in percentiles.split(",") if point.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="percentiles must be comma-separated numbers")
+        if any(not 0 <= point <= 100 for point in points):
+            raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+        filters = ScoreAnalyticsFilter(subject_id=subject_id, class_=class_, **(dates.model_dump() if dates else {}))
+        score_service = ScoreService(db)
+        groups = await score_service.get_score_analytics(group_by, filters, points, bin_width, include_archive)
+        return JSONResponse(content={"data": {"group_by": group_by, "groups": jsonable_encoder(groups)}}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
+@router.get("/leaderboard", dependencies=[RoleGuard(ANYROLE)])
+@cached_response("score", "student")
+async def get_leaderboard(
+    group_by: str = Query("subject", pattern="^(subject|class)$"),
+    k: int = Query(10, ge=1, le=MAX_LEADERBOARD_K),
+    group: str | None = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    dates: ScoreDateFilter | None = Depends(score_date_filter),
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        if group_by == "subject":
+            # Subject groups are ids; classes are compared as strings.
+            try:
+                group = int(group) if group is not None else None
+                after = int(after) if after is not None else None
+            except ValueError:
+                raise HTTPException(status_code=400, detail="group and after must be subject ids")
+        score_service = ScoreService(db)
+        boards, next_cursor = await score_service.get_leaderboard(group_by, k, group, limit, after, dates)
+        return JSONResponse(content={"data": jsonable_encoder(boards), "next_cursor": next_cursor}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
@@ -0,0 +1,187 @@
+import heapq
+import os
+from itertools import takewhile
+from cache.table_versions import table_versions
+from common.pagination import split_page
+from score.score_leaderboard_repository import ScoreLeaderboardRepository
+
+LEADERBOARD_CACHE = os.getenv("LEADERBOARD_CACHE", "False").lower() == "true"
+LEADERBOARD_CACHE_DEPTH = int(os.getenv("LEADERBOARD_CACHE_DEPTH", "100"))
+
+class GroupBoard:
+    """The top `depth` distinct score values of one group, as a min-heap so the
+    lowest value is the one evicted, plus the entries holding each value.
+
+    `complete` means the group has no scores below the ones held. A board that
+    is not complete and loses one of its values cannot know what moves up, so
+    remove() reports that it has to be reloaded."""
+
+    __slots__ = ("depth", "heap", "entries", "complete", "_ranked")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.heap = []
+        self.entries = {}
+        self.complete = True
+        self._ranked = None
+
+    def add(self, entry: dict):
+        value = entry["score"]
+        self._ranked = None
+        if value in self.entries:
+            self.entries[value].append(entry)
+        elif len(self.heap) < self.depth:
+            heapq.heappush(self.heap, value)
+            self.entries[value] = [entry]
+        else:
+            self.complete = False
+            if value > self.heap[0]:
+                del self.entries[heapq.heapreplace(self.heap, value)]
+                self.entries[value] = [entry]
+
+    def remove(self, score_id: int, value) -> bool:
+        entries = self.entries.get(value)
+        if entries is None:
+            return True
+        self._ranked = None
+        entries[:] = [entry for entry in entries if entry["score_id"] != score_id]
+        if entries:
+            return True
+        del self.entries[value]
+        self.heap.remove(value)
+        heapq.heapify(self.heap)
+        return self.complete
+
+    def ranked(self, k: int) -> list[dict]:
+        if self._ranked is None:
+            self._ranked = [
+                {"rank": rank, **entry}
+                for rank, value in enumerate(sorted(self.heap, reverse=True), start=1)
+                for entry in sorted(self.entries[value], key=lambda entry: entry["score_id"])
+            ]
+        return list(takewhile(lambda entry: entry["rank"] <= k, self._ranked))
+
+class LeaderboardCache:
+    """In-process leaderboard for one grouping, kept up to date by the score
+    writes of this worker (apply) and reloaded from the database when the
+    shared table versions show a write from anywhere else."""
+
+    def __init__(self, group_by: str, depth: int):
+        self.group_by = group_by
+        self.depth = depth
+        # Class membership lives in the student table.
+        self.tables = ("score",) if group_by == "subject" else ("score", "student")
+        self.groups = None
+        self.versions = None
+        self.class_of = None
+        self.hits = 0
+        self.loads = 0
+        self.group_reloads = 0
+
+    def _current_versions(self) -> tuple:
+        return tuple(table_versions.get(table) for table in self.tables)
+
+    def _group_of(self, entry: dict):
+        if self.group_by == "subject":
+            return entry["subject_id"]
+        return self.class_of.get(entry["student_id"])
+
+    def _build(self, rows: list[dict]) -> dict:
+        groups = {}
+        for row in rows:
+            entry = {key: value for key, value in row.items() if key not in ("group", "rank")}
+            board = groups.get(row["group"])
+            if board is None:
+                board = groups[row["group"]] = GroupBoard(self.depth)
+            board.add(entry)
+        for board in groups.values():
+            # Loaded with rank <= depth: a full heap may have more values below.
+            board.complete = len(board.heap) < self.depth
+        return groups
+
+    async def _load(self, repo: ScoreLeaderboardRepository):
+        versions = self._current_versions()
+        if self.groups is not None and versions == self.versions:
+            return
+        # Stamped with the versions read before loading: a write that lands
+        # meanwhile makes the next read reload again.
+        rows = await repo.get_top(self.group_by, self.depth)
+        self.class_of = await repo.get_student_classes() if self.group_by == "class" else None
+        self.groups = self._build(rows)
+        self.versions = versions
+        self.loads += 1
+
+    async def get_page(self, repo: ScoreLeaderboardRepository, k: int, group=None, limit: int = 20, after=None):
+        await self._load(repo)
+        if group is not None:
+            keys = [group] if group in self.groups else []
+        else:
+            # Students without a class have no group to page by, as in the database.
+            keys = sorted(
+                key for key in self.groups if key is not None and (after is None or key > after)
+            )[:limit + 1]
+        stale = [key for key in keys if self.groups[key] is None]
+        if stale:
+            rows = await repo.get_top(self.group_by, self.depth, groups=stale)
+            reloaded = self._build(rows)
+            for key in stale:
+                self.groups[key] = reloaded.get(key) or GroupBoard(self.depth)
+            self.group_reloads += len(stale)
+        self.hits += 1
+        boards = [{"group": key, "entries": self.groups[key].ranked(k)} for key in keys]
+        if group is not None:
+            return boards, None
+        return split_page(boards, limit, "group")
+
+    def apply(self, previous: int, version: int, added: list[dict], removed: list[dict]):
+        """Apply a committed score write. `previous` and `version` come from the
+        score bump; if the board was not at `previous`, another write it has
+        not seen happened in between and the board is dropped instead."""
+        if self.groups is None:
+            return
+        expected = (previous, *self._current_versions()[1:])
+        if self.versions != expected:
+            self.groups = None
+            return
+        for entry in removed:
+            key = self._group_of(entry)
+            board = self.groups.get(key)
+            if board is not None and not board.remove(entry["score_id"], entry["score"]):
+                self.groups[key] = None
+        for entry in added:
+            if entry["score"] is None:
+                continue
+            if self.group_by == "class" and entry["student_id"] not in self.class_of:
+                # A student this board has not seen; reload everything.
+                self.groups = None
+                return
+            key = self._group_of(entry)
+            if key not in self.groups:
+                self.groups[key] = GroupBoard(self.depth)
+            board = self.groups[key]
+            if board is not None:
+                # Same shape and types as the rows loaded from the database.
+                board.add({
+                    "score_id": entry["score_id"], "student_id": entry["student_id"], "subject_id": entry["subject_id"],
+                    "score": float(entry["score"]), "date": entry["date"],
+                })
+        self.versions = (version, *self.versions[1:])
+
+    def stats(self) -> dict:
+        return {
+            "group_by": self.group_by,
+            "depth": self.depth,
+            "groups": len(self.groups) if self.groups is not None else 0,
+            "hits": self.hits,
+            "loads": self.loads,
+            "group_reloads": self.group_reloads,
+        }
+
+leaderboard_caches = (
+    {group_by: LeaderboardCache(group_by, LEADERBOARD_CACHE_DEPTH) for group_by in ("subject", "class")}
+    if LEADERBOARD_CACHE else {}
+)
+
+def apply_score_changes(previous: int, version: int, added=(), removed=()):
+    for cache in leaderboard_caches.values():
+        cache.apply(previous, version, list(added), list(removed))
@@ -0,0 +1,71 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from score.score_model import Score
+from score.score_schema import ScoreDateFilter
+from student.student_model import Student
+
+GROUP_COLUMNS = {"subject": Score.subject_id, "class": Student.class_}
+ENTRY_COLUMNS = (Score.score_id, Score.student_id, Score.subject_id, Score.score, Score.date)
+
+class ScoreLeaderboardRepository:
+    """Top-K scores per subject or class with dense ranking (ties share a rank
+    and the next rank follows on), computed with DENSE_RANK() in the database."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _scoped(self, query, group_by: str, dates: ScoreDateFilter | None = None):
+        query = query.select_from(Score).filter(Score.score.is_not(None))
+        if dates is not None:
+            query = query.filter(*dates.conditions(Score.date))
+        if group_by == "class":
+            query = query.join(Student, Student.student_id == Score.student_id)
+        return query
+
+    async def get_top(self, group_by: str, k: int, groups: list | None = None,
+                      after=None, limit: int | None = None, dates: ScoreDateFilter | None = None) -> list[dict]:
+        """Entries with rank <= k, ordered by group, rank and score_id. Either
+        restricted to `groups`, or to the first `limit` groups after `after`.
+        With `dates`, only scores in that range are ranked."""
+        group = GROUP_COLUMNS[group_by]
+        # PARTITION BY subject_id ORDER BY score DESC is a backwards scan of
+        # ix_score_subject_id_score.
+        rank = func.dense_rank().over(partition_by=group, order_by=Score.score.desc())
+        ranked = self._scoped(select(group.label("group"), rank.label("rank"), *ENTRY_COLUMNS), group_by, dates)
+        if groups is not None:
+            ranked = ranked.filter(group.in_(groups))
+        if limit is not None:
+            # A derived table rather than IN (... LIMIT): MySQL rejects LIMIT in IN subqueries.
+            # Students without a class have no group to page by; a NULL group
+            # would take a slot of the page and then drop out of the join.
+            page = (
+                self._scoped(select(group.label("group")), group_by, dates)
+                .filter(group.is_not(None)).distinct().order_by(group).limit(limit)
+            )
+            if after is not None:
+                page = page.filter(group > after)
+            page = page.subquery()
+            ranked = ranked.join(page, group == page.c.group)
+        ranked = ranked.subquery()
+        query = (
+            select(ranked)
+            .where(ranked.c.rank <= k)
+            .order_by(ranked.c.group, ranked.c.rank, ranked.c.score_id)
+        )
+        result = await self.db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def get_student_classes(self) -> dict:
+        result = await self.db.execute(select(Student.student_id, Student.class_))
+        return dict(result.all())
+
+def group_entries(rows: list[dict]) -> list[dict]:
+    """[{group, entries: [...]}, ...] from rows ordered by group."""
+    boards = []
+    for row in rows:
+        row = dict(row)
+        group = row.pop("group")
+        if not boards or boards[-1]["group"] != group:
+            boards.append({"group": group, "entries": []})
+        boards[-1]["entries"].append(row)
+    return boards
@@ -1,10 +1,17 @@
-from sqlalchemy import Integer, Date, ForeignKey, Float
+from sqlalchemy import Integer, Date, ForeignKey, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.database import Base
 
 
 class Score(Base):
     __tablename__ = "score"
+    # Created by migrations v002_score_indexes and v005_score_archive
+    __table_args__ = (
+        Index("ix_score_student_id_score", "student_id", "score"),
+        Index("ix_score_subject_id_score", "subject_id", "score"),
+        Index("ix_score_score", "score"),
+        Index("ix_score_date", "date"),
+    )
 
     score_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(Integer, ForeignKey("student.student_id"), primary_key=True, autoincrement=False)
@@ -1,55 +1,217 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, delete, exists, literal, union_all, and_, bindparam, Integer, Float, Date
 from score.score_model import Score
+from score.score_archive_model import ScoreArchive
+from student.student_model import Student
+from subject.subject_model import Subject
 from sqlalchemy.exc import SQLAlchemyError
-from score.score_schema import ScoreSchema
+from score.score_schema import ScoreSchema, ScoreRow, ScoreDateFilter
+from score.score_aggregate_model import StudentScoreAggregate, SubjectScoreAggregate
+from score.score_aggregate_repository import ScoreAggregateRepository
+from cache.table_versions import table_versions
+from score.score_leaderboard_cache import apply_score_changes
+
+# Read queries select these columns as plain rows: nothing goes through the
+# session's identity map. Only get_by_id, used by the write paths, loads entities.
+SCORE_COLUMNS = (Score.student_id, Score.subject_id, Score.score_id, Score.score, Score.date)
+
+# Hot statements are built once with bindparam placeholders; their cache key is
+# memoized, so every call goes straight to the engine's compiled cache.
+SCORES_BY_ID = select(*SCORE_COLUMNS).order_by(Score.score_id)
+SCORE_PAGE_FIRST = SCORES_BY_ID.limit(bindparam("limit"))
+SCORE_PAGE_AFTER = SCORES_BY_ID.filter(Score.score_id > bindparam("after")).limit(bindparam("limit"))
+TOP_SCORES = select(*SCORE_COLUMNS).order_by(Score.score.desc()).limit(bindparam("limit"))
+SCORE_BY_ID = select(Score).filter(Score.score_id == bindparam("score_id"))
+
+# Reads filtered by from/to/term are built per call from the statements here;
+# unfiltered ones keep using them as they are and, for averages, the aggregate tables.
+def date_conditions(date_column, dates: ScoreDateFilter | None) -> list:
+    return dates.conditions(date_column) if dates is not None else []
+
+# Per-student reads start from the student row and outer join the scores, so an
+# unknown student (no rows) and a student without scores (one all-NULL score row)
+# are told apart by the same statement. A date filter goes in the ON clause for
+# the same reason.
+def student_scores_statement(dates: ScoreDateFilter | None = None):
+    return (
+        select(Student.student_id, Score.subject_id, Score.score_id, Score.score, Score.date)
+        .select_from(Student)
+        .outerjoin(Score, and_(Score.student_id == Student.student_id, *date_conditions(Score.date, dates)))
+        .filter(Student.student_id == bindparam("student_id"))
+    )
+
+_STUDENT_SCORES = student_scores_statement()
+STUDENT_SCORES_ASC = _STUDENT_SCORES.order_by(Score.score.asc())
+STUDENT_SCORES_DESC = _STUDENT_SCORES.order_by(Score.score.desc())
+STUDENT_SCORE_STATS = (
+    select(Student.student_id, StudentScoreAggregate.score_count, StudentScoreAggregate.score_sum)
+    .select_from(Student)
+    .outerjoin(StudentScoreAggregate, StudentScoreAggregate.student_id == Student.student_id)
+    .filter(Student.student_id == bindparam("student_id"))
+)
+
+# Columns score_archive shares with score.
+ARCHIVED_COLUMNS = ("student_id", "subject_id", "score_id", "score", "date")
+
+def score_source(include_archive: bool):
+    """The score table, or score and score_archive as one UNION ALL derived table."""
+    if not include_archive:
+        return _score_table
+    return union_all(
+        select(*(_score_table.c[column] for column in ARCHIVED_COLUMNS)),
+        select(*(_archive_table.c[column] for column in ARCHIVED_COLUMNS)),
+    ).subquery("scores")
+
+SUBJECT_SCORE_STATS = select(SubjectScoreAggregate.subject_id, SubjectScoreAggregate.score_count, SubjectScoreAggregate.score_sum)
+
+def student_score_stats(dates: ScoreDateFilter):
+    rows = student_scores_statement(dates).subquery()
+    return select(
+        rows.c.student_id,
+        func.count(rows.c.score).label("score_count"),
+        func.coalesce(func.sum(rows.c.score), 0).label("score_sum"),
+    ).group_by(rows.c.student_id)
+
+def score_stats(table, key: str, dates: ScoreDateFilter | None = None):
+    """count/sum of score per `key` over score or score_archive, computed from the rows."""
+    return select(
+        table.c[key],
+        func.count(table.c.score).label("score_count"),
+        func.coalesce(func.sum(table.c.score), 0).label("score_sum"),
+    ).filter(*date_conditions(table.c.date, dates)).group_by(table.c[key])
+
+# INSERT ... SELECT that only produces a row when the student and subject exist
+# (and, with an explicit score_id, when that id is still free).
+_score_table = Score.__table__
+_archive_table = ScoreArchive.__table__
+_INSERT_SCORE_SOURCE = (
+    select(
+        bindparam("student_id", type_=Integer),
+        bindparam("subject_id", type_=Integer),
+        bindparam("score", type_=Float),
+        bindparam("date", type_=Date),
+    )
+    .select_from(Student)
+    .filter(Student.student_id == bindparam("student_id"))
+    .filter(exists().where(Subject.subject_id == bindparam("subject_id")))
+)
+INSERT_SCORE = insert(_score_table).from_select(["student_id", "subject_id", "score", "date"], _INSERT_SCORE_SOURCE)
+INSERT_SCORE_WITH_ID = insert(_score_table).from_select(
+    ["student_id", "subject_id", "score", "date", "score_id"],
+    _INSERT_SCORE_SOURCE.add_columns(bindparam("score_id", type_=Integer))
+    .filter(~exists().where(_score_table.c.score_id == bindparam("score_id")))
+    .filter(~exists().where(_archive_table.c.score_id == bindparam("score_id"))),
+)
+INSERT_SCORE_RETURNING = INSERT_SCORE.returning(_score_table.c.score_id)
+
+# DELETE by score_id, student_id or subject_id: (plain, RETURNING, SELECT for
+# dialects without DELETE ... RETURNING) for each key.
+REMOVED_SCORE_COLUMNS = (_score_table.c.student_id, _score_table.c.subject_id, _score_table.c.score)
+
+def _delete_scores_statements(key: str):
+    condition = _score_table.c[key] == bindparam(key)
+    stmt = delete(_score_table).where(condition)
+    return stmt, stmt.returning(*REMOVED_SCORE_COLUMNS), select(*REMOVED_SCORE_COLUMNS).where(condition)
+
+DELETE_SCORES_BY = {key: _delete_scores_statements(key) for key in ("score_id", "student_id", "subject_id")}
 
 class ScoreRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.aggregates = ScoreAggregateRepository(db)
 
-    async def get_all(self):
-        result = await self.db.execute(select(Score))
-        return result.scalars().all()
+    async def get_all(self) -> list[ScoreRow]:
+        result = await self.db.execute(select(*SCORE_COLUMNS))
+        return [dict(row) for row in result.mappings()]
 
-    async def get_student_scores(self, student_id: int, isAscending: bool = True):
-        order_by = Score.score.asc() if isAscending else Score.score.desc()
-        result = await self.db.execute(
-            select(Score).filter(Score.student_id == student_id).order_by(order_by)
-        )
-        return result.scalars().all()
+    async def get_page(self, limit: int, after: int | None = None, dates: ScoreDateFilter | None = None) -> list[ScoreRow]:
+        query, params = SCORE_PAGE_FIRST, {"limit": limit}
+        if after is not None:
+            query, params = SCORE_PAGE_AFTER, {"limit": limit, "after": after}
+        if dates is not None:
+            query = query.filter(*dates.conditions(Score.date))
+        result = await self.db.execute(query, params)
+        return [dict(row) for row in result.mappings()]
 
-    async def get_student_avg_score(self, student_id: int):
-        result = await self.db.execute(
-            select(func.avg(Score.score)).filter(Score.student_id == student_id)
-        )
-        avg_score = result.scalar_one_or_none()
-        return avg_score if avg_score is not None else 0
+    async def stream_all(self, batch_size: int = 1000, dates: ScoreDateFilter | None = None):
+        query = SCORES_BY_ID
+        if dates is not None:
+            query = query.filter(*dates.conditions(Score.date))
+        result = await self.db.stream(query, execution_options={"yield_per": batch_size})
+        async for row in result.mappings():
+            yield dict(row)
+
+    async def get_student_scores(self, student_id: int, isAscending: bool = True,
+                                 dates: ScoreDateFilter | None = None) -> list[ScoreRow] | None:
+        """The student's scores, or None when the student does not exist."""
+        if dates is None:
+            query = STUDENT_SCORES_ASC if isAscending else STUDENT_SCORES_DESC
+        else:
+            query = student_scores_statement(dates).order_by(Score.score.asc() if isAscending else Score.score.desc())
+        result = await self.db.execute(query, {"student_id": student_id})
+        rows = [dict(row) for row in result.mappings()]
+        if not rows:
+            return None
+        return [row for row in rows if row["score_id"] is not None]
+
+    async def get_student_avg_score(self, student_id: int, dates: ScoreDateFilter | None = None,
+                                    include_archive: bool = False):
+        """The student's average score (0 without scores), or None when the student does not exist."""
+        query = STUDENT_SCORE_STATS if dates is None else student_score_stats(dates)
+        stats = (await self.db.execute(query, {"student_id": student_id})).one_or_none()
+        if stats is None:
+            return None
+        count, total = stats.score_count or 0, stats.score_sum or 0
+        if include_archive:
+            archived = (await self.db.execute(
+                score_stats(_archive_table, "student_id", dates).filter(_archive_table.c.student_id == student_id)
+            )).one_or_none()
+            if archived is not None:
+                count, total = count + archived.score_count, total + archived.score_sum
+        if not count:
+            return 0
+        return total / count
     
     async def get_max_subject_scores(self):
-        subquery = (
+        # Equivalent to rank() = 1 per subject: the subject's max comes from the
+        # aggregate table and the matching rows from the (subject_id, score) index.
+        result = await self.db.execute(
             select(
                 Score.subject_id,
                 Score.student_id,
                 Score.score,
-                func.rank().over(
-                    partition_by=Score.subject_id,
-                    order_by=Score.score.desc()
-                ).label("rank")
+                literal(1).label("rank"),
+            )
+            .join(
+                SubjectScoreAggregate,
+                (SubjectScoreAggregate.subject_id == Score.subject_id)
+                & (SubjectScoreAggregate.score_max == Score.score),
             )
-            .subquery()
-        )
-        result = await self.db.execute(
-            select(subquery).filter(subquery.c.rank == 1)
         )
         return result.mappings().all()
 
-    async def add(self, score: ScoreSchema):
+    async def add(self, score: ScoreSchema) -> ScoreSchema | None:
+        """Insert the score with a single INSERT ... SELECT that also checks the
+        references. Returns None when it was not inserted because the student or
+        subject does not exist or score_id is taken."""
         try:
-            score = Score(**score.model_dump())
-            self.db.add(score)
+            values = score.model_dump()
+            if score.score_id is not None:
+                result = await self.db.execute(INSERT_SCORE_WITH_ID, values)
+                if result.rowcount == 0:
+                    return None
+            else:
+                if self.db.get_bind().dialect.insert_returning:
+                    score_id = (await self.db.execute(INSERT_SCORE_RETURNING, values)).scalar()
+                else:
+                    result = await self.db.execute(INSERT_SCORE, values)
+                    score_id = result.lastrowid if result.rowcount else None
+                if score_id is None:
+                    return None
+                score = score.model_copy(update={"score_id": score_id})
+            await self.aggregates.add_scores([(score.student_id, score.subject_id, score.score)])
             await self.db.commit()
-            await self.db.refresh(score)
+            apply_score_changes(*table_versions.bump("score"), added=[score.model_dump()])
             return score
         except SQLAlchemyError as e:
             await self.db.rollback()
@@ -57,47 +219,117 @@ class ScoreRepository:
             return None
 
     async def get_by_id(self, score_id: int):
-        result = await self.db.execute(
-            select(Score).filter(Score.score_id == score_id)
-        )
+        result = await self.db.execute(SCORE_BY_ID, {"score_id": score_id})
         return result.scalar_one_or_none()
 
-    async def delete(self, score: Score):
+    async def delete_returning(self, key: str, value: int) -> list[tuple]:
+        """DELETE the scores whose `key` column equals `value` and return their
+        (student_id, subject_id, score), with RETURNING where the dialect has it."""
+        stmt, returning_stmt, select_stmt = DELETE_SCORES_BY[key]
+        params = {key: value}
+        if self.db.get_bind().dialect.delete_returning:
+            result = await self.db.execute(returning_stmt, params)
+            return [tuple(row) for row in result.all()]
+        removed = [tuple(row) for row in (await self.db.execute(select_stmt, params)).all()]
+        if removed:
+            await self.db.execute(stmt, params)
+        return removed
+
+    async def delete(self, score_id: int) -> bool:
         try:
-            await self.db.delete(score)
+            removed = await self.delete_returning("score_id", score_id)
+            if not removed:
+                return False
+            await self.aggregates.remove_scores(removed)
             await self.db.commit()
+            apply_score_changes(*table_versions.bump("score"), removed=[
+                {"score_id": score_id, "student_id": student_id, "subject_id": subject_id, "score": value}
+                for student_id, subject_id, value in removed
+            ])
             return True
         except SQLAlchemyError as e:
             await self.db.rollback()
             print(f"Error deleting score: {e}")
             return False
 
-    async def update(self, score: Score, score_data: ScoreSchema):
+    async def update(self, score_id: int, changes: dict) -> ScoreSchema | None:
+        """Apply `changes` to the score. The current row is read first because
+        the aggregates need the old values; no refresh after the commit."""
         try:
-            for key, value in score_data.model_dump().items():
+            score = await self.get_by_id(score_id)
+            if score is None:
+                return None
+            previous = ScoreSchema.model_validate(score)
+            for key, value in changes.items():
                 setattr(score, key, value)
+            await self.db.flush()
+            await self.aggregates.remove_scores([(previous.student_id, previous.subject_id, previous.score)])
+            await self.aggregates.add_scores([(score.student_id, score.subject_id, score.score)])
             await self.db.commit()
-            await self.db.refresh(score)
-            return score
-        except Exception as e:
+            updated = ScoreSchema.model_validate(score)
+            apply_score_changes(*table_versions.bump("score"), added=[updated.model_dump()], removed=[previous.model_dump()])
+            return updated
+        except SQLAlchemyError as e:
+            await self.db.rollback()
             print(f"Error updating score: {e}")
             return None
 
-    async def get_top_scores(self, limit: int = 10):
-        result = await self.db.execute(
-            select(Score).order_by(Score.score.desc()).limit(limit)
-        )
-        return result.scalars().all()
+    async def get_top_scores(self, limit: int = 10, dates: ScoreDateFilter | None = None) -> list[ScoreRow]:
+        query = TOP_SCORES if dates is None else TOP_SCORES.filter(*dates.conditions(Score.date))
+        result = await self.db.execute(query, {"limit": limit})
+        return [dict(row) for row in result.mappings()]
         
-    async def calculate_all_avg_scores(self):
+    async def calculate_all_avg_scores(self, dates: ScoreDateFilter | None = None, include_archive: bool = False):
         try:
-            result = await self.db.execute(
-                select(
-                    Score.subject_id,
-                    func.avg(Score.score).label("avg_score")
-                ).group_by(Score.subject_id)
-            )
-            return result.mappings().all()
+            if dates is None and not include_archive:
+                stats = await self.aggregates.get_all_subject_stats()
+            else:
+                stats = await self.get_subject_stats(dates, include_archive)
+            return [{"subject_id": row.subject_id, "avg_score": row.score_sum / row.score_count} for row in stats]
         except SQLAlchemyError as e:
             print(f"Error calculating average scores: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    async def get_subject_stats(self, dates: ScoreDateFilter | None, include_archive: bool):
+        """Per-subject count and sum over the scores in the date range, with the
+        archived ones added when asked. Live scores come from the aggregate
+        table when there is no date filter."""
+        parts = [SUBJECT_SCORE_STATS if dates is None else score_stats(_score_table, "subject_id", dates)]
+        if include_archive:
+            parts.append(score_stats(_archive_table, "subject_id", dates))
+        stats = union_all(*parts).subquery()
+        score_count = func.sum(stats.c.score_count)
+        result = await self.db.execute(
+            select(stats.c.subject_id, score_count.label("score_count"), func.sum(stats.c.score_sum).label("score_sum"))
+            .group_by(stats.c.subject_id)
+            .having(score_count > 0)
+            .order_by(stats.c.subject_id)
+        )
+        return result.all()
+
+    async def find_existing_references(self, student_ids: set, subject_ids: set, score_ids: set):
+        # One round trip for the whole chunk: which of the referenced ids exist.
+        queries = [
+            select(literal("student").label("kind"), Student.student_id.label("id")).filter(Student.student_id.in_(student_ids)),
+            select(literal("subject").label("kind"), Subject.subject_id.label("id")).filter(Subject.subject_id.in_(subject_ids)),
+        ]
+        if score_ids:
+            # score_id is unique across live and archived scores.
+            queries.append(select(literal("score").label("kind"), Score.score_id.label("id")).filter(Score.score_id.in_(score_ids)))
+            queries.append(select(literal("score").label("kind"), _archive_table.c.score_id.label("id")).filter(_archive_table.c.score_id.in_(score_ids)))
+        result = await self.db.execute(union_all(*queries))
+        existing = {"student": set(), "subject": set(), "score": set()}
+        for kind, id_ in result.all():
+            existing[kind].add(id_)
+        return existing
+
+    async def bulk_insert(self, rows: list[dict]):
+        # executemany needs the same keys in every parameter set, so rows that
+        # let the database assign score_id go in their own statement.
+        with_id = [row for row in rows if row.get("score_id") is not None]
+        without_id = [{k: v for k, v in row.items() if k != "score_id"} for row in rows if row.get("score_id") is None]
+        if with_id:
+            await self.db.execute(insert(Score), with_id)
+        if without_id:
+            await self.db.execute(insert(Score), without_id)
+        await self.aggregates.add_scores([(row["student_id"], row["subject_id"], row["score"]) for row in rows])
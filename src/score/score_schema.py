@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional
+from typing_extensions import TypedDict
 import datetime
 
 class ScoreSchema(BaseModel):
@@ -17,4 +18,45 @@ class StudentScoreSchema(BaseModel):
     isAscending: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SubjectAvgScoreSchema(BaseModel):
+    subject_id: int
+    avg_score: float
+
+    class Config:
+        from_attributes = True
+
+class ScoreDateFilter(BaseModel):
+    """Inclusive bounds on Score.date; None on either side is open."""
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+    def conditions(self, date_column) -> list:
+        """WHERE/ON conditions on `date_column` for these bounds."""
+        conditions = []
+        if self.date_from is not None:
+            conditions.append(date_column >= self.date_from)
+        if self.date_to is not None:
+            conditions.append(date_column <= self.date_to)
+        return conditions
+
+class ScoreAnalyticsFilter(ScoreDateFilter):
+    subject_id: Optional[int] = None
+    class_: Optional[str] = None
+
+# Row shapes returned by the read queries, serialized directly by TypeAdapter
+class ScoreRow(TypedDict):
+    student_id: int
+    subject_id: int
+    score_id: int
+    score: Optional[float]
+    date: Optional[datetime.date]
+
+class SubjectAvgScoreRow(TypedDict):
+    subject_id: int
+    avg_score: float
+
+score_row_adapter = TypeAdapter(ScoreRow)
+score_rows_adapter = TypeAdapter(list[ScoreRow])
+subject_avg_score_rows_adapter = TypeAdapter(list[SubjectAvgScoreRow])
@@ -1,30 +1,43 @@
+import math
 from sqlalchemy.ext.asyncio import AsyncSession
-from score.score_model import Score
 from score.score_repository import ScoreRepository
-import datetime
 from student.student_repository import StudentRepository
-from score.score_schema import ScoreSchema
+from subject.subject_repository import SubjectRepository
+from score.score_schema import ScoreSchema, ScoreAnalyticsFilter, ScoreDateFilter
+from score.score_analytics_repository import ScoreAnalyticsRepository
+from score.score_leaderboard_repository import ScoreLeaderboardRepository, group_entries
+from score.score_leaderboard_cache import leaderboard_caches
+from common.pagination import split_page
+from cache.table_versions import table_versions
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 class ScoreService:
     def __init__(self, db: AsyncSession):
         self.repository = ScoreRepository(db)
         self.student_repo = StudentRepository(db)
+        self.subject_repo = SubjectRepository(db)
 
     async def get_all_scores(self):
         result = await self.repository.get_all()
         return result
 
-    async def get_student_scores(self, student_id: int, is_ascending: bool):
-        is_existing_student = await self.student_repo.get_by_id(student_id)
-        if not is_existing_student:
+    async def get_scores_page(self, limit: int, after: int | None = None, dates: ScoreDateFilter | None = None):
+        scores = await self.repository.get_page(limit + 1, after, dates)
+        return split_page(scores, limit, "score_id")
+
+    def stream_all_scores(self, dates: ScoreDateFilter | None = None):
+        return self.repository.stream_all(dates=dates)
+
+    async def get_student_scores(self, student_id: int, is_ascending: bool, dates: ScoreDateFilter | None = None):
+        result = await self.repository.get_student_scores(student_id, is_ascending, dates)
+        if result is None:
             raise ValueError("Student not found.")
-        result = await self.repository.get_student_scores(student_id, is_ascending)
         return result
 
-    async def get_student_avg_score(self, student_id: int):
-        is_existing_student = await self.student_repo.get_by_id(student_id)
-        if not is_existing_student:
+    async def get_student_avg_score(self, student_id: int, dates: ScoreDateFilter | None = None, include_archive: bool = False):
+        result = await self.repository.get_student_avg_score(student_id, dates, include_archive)
+        if result is None:
             raise ValueError("Student not found.")
-        result = await self.repository.get_student_avg_score(student_id)
         return result
     
 
@@ -32,47 +45,143 @@ class ScoreService:
         result = await self.repository.get_max_subject_scores()
         return result
 
+    async def get_top_scores(self, limit: int = 10, dates: ScoreDateFilter | None = None):
+        result = await self.repository.get_top_scores(limit, dates)
+        return result
+
+    async def calculate_all_avg_scores(self, dates: ScoreDateFilter | None = None, include_archive: bool = False):
+        result = await self.repository.calculate_all_avg_scores(dates, include_archive)
+        return result
+
+    async def get_score_analytics(self, group_by: str, filters: ScoreAnalyticsFilter, percentiles: list[float], bin_width: float,
+                                  include_archive: bool = False):
+        """Count, mean, population standard deviation, min/max, percentiles and a
+        histogram with `bin_width` wide buckets for every group."""
+        analytics = ScoreAnalyticsRepository(self.repository.db, include_archive)
+        groups = {}
+        for row in await analytics.get_summary(group_by, filters):
+            if not row["count"]:
+                continue
+            key = row.get("group")
+            mean = row["sum"] / row["count"]
+            groups[key] = {
+                "group": key,
+                "count": row["count"],
+                "mean": mean,
+                "stddev": math.sqrt(max(row["sum_sq"] / row["count"] - mean * mean, 0.0)),
+                "min": row["min"],
+                "max": row["max"],
+                "percentiles": {},
+                "histogram": [],
+            }
+        values = await analytics.get_percentiles(group_by, filters, [percentile / 100 for percentile in percentiles])
+        for key, by_fraction in values.items():
+            groups[key]["percentiles"] = {
+                f"p{percentile:g}": by_fraction[percentile / 100] for percentile in percentiles
+            }
+        for row in await analytics.get_histogram(group_by, filters, bin_width):
+            groups[row.get("group")]["histogram"].append(
+                {"from": row["bucket"] * bin_width, "to": (row["bucket"] + 1) * bin_width, "count": row["count"]}
+            )
+        for group in groups.values():
+            group["histogram"].sort(key=lambda bucket: bucket["from"])
+        return list(groups.values())
+
+    async def get_leaderboard(self, group_by: str, k: int, group=None, limit: int = 20, after=None,
+                              dates: ScoreDateFilter | None = None):
+        """Top-k dense-ranked scores for one group, or a page of groups. Served
+        from the in-memory leaderboard when LEADERBOARD_CACHE is on; it holds
+        all scores, so a date-filtered board always comes from the database."""
+        repo = ScoreLeaderboardRepository(self.repository.db)
+        cache = leaderboard_caches.get(group_by)
+        if cache is not None and k <= cache.depth and dates is None:
+            return await cache.get_page(repo, k, group, limit, after)
+        if group is not None:
+            return group_entries(await repo.get_top(group_by, k, groups=[group], dates=dates)), None
+        rows = await repo.get_top(group_by, k, after=after, limit=limit + 1, dates=dates)
+        return split_page(group_entries(rows), limit, "group")
+
     async def add_score(self, score: ScoreSchema):
-        if score is not None:
-            is_existing_score = await self.repository.get_by_id(score.score_id)
-            if is_existing_score:
+        if score.student_id is None or score.subject_id is None:
+            raise ValueError("student_id and subject_id are required.")
+        added = await self.repository.add(score)
+        if added is None:
+            # The insert checks the references itself; only a rejected insert
+            # pays for finding out which one failed.
+            existing = await self.repository.find_existing_references(
+                {score.student_id}, {score.subject_id}, {score.score_id} if score.score_id is not None else set()
+            )
+            if score.student_id not in existing["student"]:
+                raise ValueError("Student not found.")
+            if score.subject_id not in existing["subject"]:
+                raise ValueError("Subject not found.")
+            if score.score_id in existing["score"]:
                 raise ValueError("Score already exists.")
-        student = await self.student_repo.get_by_id(score.student_id)
-        subject = await self.repository.get_subject_by_id(score.subject_id)
-        if not student:
+        return added
+
+    async def remove_score(self, score_id: int):
+        return await self.repository.delete(score_id)
+
+    async def update_score(self, score_id: int, score: ScoreSchema):
+        # Only the fields sent in the request are changed; score_id comes from the path.
+        changes = {
+            key: value for key, value in score.model_dump(exclude_unset=True).items()
+            if value is not None and key != "score_id"
+        }
+        if "student_id" in changes and not await self.student_repo.exists(changes["student_id"]):
             raise ValueError("Student not found.")
-        if not subject:
+        if "subject_id" in changes and not await self.subject_repo.exists(changes["subject_id"]):
             raise ValueError("Subject not found.")
-        score = self.repository.add(score)
-        return score        
+        return await self.repository.update(score_id, changes)
 
-    async def remove_score(self, score_id: int):
-        if score_id is None:
-            return {"status": "error", "message": "Missing score_id"}
-        existing = await self.repository.get_by_id(score_id)
-        if not existing:
-            return {"status": "error", "message": "Score not found"}
-        try:
-            deleted_score = await self.repository.delete(existing.get("data"))
-            if deleted_score.get("status") == "error":
-                return {"status": "error", "message": deleted_score.get("message")}
-            return deleted_score
-        except Exception:
-            return {"status": "error", "message": "Failed to delete score"}
-
-    async def update_score(self, score_id: int, score: float, date: datetime.date, student_id: int, subject_id: int):
-        if score_id is None:
-            return {"status": "error", "message": "Missing score_id"}
-        existing = await self.repository.get_by_id(score_id)
-        if not existing:
-            return {"status": "error", "message": "Score not found"}
-        current_score = existing.get("data")
-        current_score.score = score if score is not None else current_score.score
-        current_score.date = date if date is not None else current_score.date
-        current_score.student_id = student_id if student_id is not None else current_score.student_id
-        current_score.subject_id = subject_id if subject_id is not None else current_score.subject_id
-        updated_score = await self.repository.update(current_score)
-        if updated_score.get("status") == "error":
-            return {"status": "error", "message": updated_score.get("message")}
-        return updated_score
+    async def import_scores(self, rows: list[dict], batch_size: int = 1000):
+        """Validate and insert scores in batches inside one transaction.
+
+        Rows that fail validation or reference a missing student/subject are
+        skipped and reported; all other rows are inserted."""
+        errors = []
+        valid = []
+        for index, row in enumerate(rows, start=1):
+            try:
+                score = ScoreSchema.model_validate(row)
+            except ValidationError as e:
+                message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                errors.append({"row": index, "error": message})
+                continue
+            if score.student_id is None or score.subject_id is None:
+                errors.append({"row": index, "error": "student_id and subject_id are required"})
+                continue
+            valid.append((index, score.model_dump()))
 
+        inserted = 0
+        seen_score_ids = set()
+        db = self.repository.db
+        try:
+            for start in range(0, len(valid), batch_size):
+                chunk = valid[start:start + batch_size]
+                existing = await self.repository.find_existing_references(
+                    {row["student_id"] for _, row in chunk},
+                    {row["subject_id"] for _, row in chunk},
+                    {row["score_id"] for _, row in chunk if row["score_id"] is not None},
+                )
+                batch = []
+                for index, row in chunk:
+                    if row["student_id"] not in existing["student"]:
+                        errors.append({"row": index, "error": "Student not found."})
+                    elif row["subject_id"] not in existing["subject"]:
+                        errors.append({"row": index, "error": "Subject not found."})
+                    elif row["score_id"] is not None and (row["score_id"] in existing["score"] or row["score_id"] in seen_score_ids):
+                        errors.append({"row": index, "error": "Score already exists."})
+                    else:
+                        if row["score_id"] is not None:
+                            seen_score_ids.add(row["score_id"])
+                        batch.append(row)
+                await self.repository.bulk_insert(batch)
+                inserted += len(batch)
+            await db.commit()
+            table_versions.bump("score")
+        except SQLAlchemyError:
+            await db.rollback()
+            raise
+        errors.sort(key=lambda error: error["row"])
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
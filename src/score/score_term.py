@@ -0,0 +1,44 @@
+"""Terms (semesters) as date ranges.
+
+TERM_START_MONTHS lists the month each term of a year starts in. A term is
+named <year>-<n>, n counted from 1, and runs until the day before the next
+term starts, which for the last term of a year is the first of the next year.
+"""
+import datetime
+import os
+
+TERM_START_MONTHS = tuple(int(month) for month in os.getenv("TERM_START_MONTHS", "1,7").split(","))
+if not 1 <= len(TERM_START_MONTHS) <= 9 or list(TERM_START_MONTHS) != sorted(set(TERM_START_MONTHS)) \
+        or not all(1 <= month <= 12 for month in TERM_START_MONTHS):
+    raise ValueError("TERM_START_MONTHS must be 1 to 9 increasing months, e.g. 1,7")
+TERM_PATTERN = rf"^[1-9]\d{{3}}-[1-{len(TERM_START_MONTHS)}]$"
+
+def term_range(term: str) -> tuple[datetime.date, datetime.date]:
+    """First and last day of the term, both inclusive."""
+    year, _, number = term.partition("-")
+    index = int(number) - 1
+    if not 0 <= index < len(TERM_START_MONTHS):
+        raise ValueError(f"Unknown term {term}")
+    start = datetime.date(int(year), TERM_START_MONTHS[index], 1)
+    if index + 1 < len(TERM_START_MONTHS):
+        next_start = datetime.date(int(year), TERM_START_MONTHS[index + 1], 1)
+    else:
+        next_start = datetime.date(int(year) + 1, TERM_START_MONTHS[0], 1)
+    return start, next_start - datetime.timedelta(days=1)
+
+def term_of(day: datetime.date) -> str:
+    # Months before the first start belong to the last term of the previous year.
+    if day.month < TERM_START_MONTHS[0]:
+        return f"{day.year - 1}-{len(TERM_START_MONTHS)}"
+    number = sum(1 for month in TERM_START_MONTHS if month <= day.month)
+    return f"{day.year}-{number}"
+
+def is_closed(term: str, today: datetime.date | None = None) -> bool:
+    return term_range(term)[1] < (today or datetime.date.today())
+
+def date_bounds(date_from: datetime.date | None, date_to: datetime.date | None, term: str | None):
+    """(date_from, date_to) narrowed to the term when one is given."""
+    if term is None:
+        return date_from, date_to
+    start, end = term_range(term)
+    return max(start, date_from or start), min(end, date_to or end)
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from student.student_service import StudentService
-from database.database import get_db
-from student.student_schema import StudentSchema
+from database.database import get_db, get_read_db
+from student.student_schema import StudentSchema, student_row_adapter, student_rows_adapter, transcript_adapter, transcripts_adapter
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi.encoders import jsonable_encoder
 from guard.guard_service import RoleGuard
+from cache.response_cache import cached_response
+from common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ndjson_response
+from common.serialization import data_response
+from metrics.metrics_registry import record_exception
 
 router = APIRouter(
     prefix="/api/students",
@@ -15,8 +19,10 @@ router = APIRouter(
 )
 
 ANYROLE = ["admin", "user"]
+MAX_UPSERT_CHUNK_SIZE = 5000
 
-def handle_exception(e: Exception):
+async def handle_exception(e: Exception):
+    record_exception(router, e)
     if isinstance(e, HTTPException):
         return JSONResponse(content={"message": e.detail}, status_code=e.status_code)
     elif isinstance(e, SQLAlchemyError):
@@ -25,13 +31,22 @@ def handle_exception(e: Exception):
         return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
     
 @router.get("/list", dependencies=[RoleGuard(ANYROLE)])
-async def get_students(db: AsyncSession = Depends(get_db)):
+@cached_response("student")
+async def get_students(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
+        if stream:
+            return ndjson_response(request, lambda session: StudentService(session).stream_all_students(), student_row_adapter)
         student_service = StudentService(db)
-        students = await student_service.get_all_students()
+        students, next_cursor = await student_service.get_students_page(limit, after)
         if students is None:
             raise HTTPException(status_code=404, detail="No students found")
-        return JSONResponse(content={"data": jsonable_encoder(students)}, status_code=200)
+        return data_response(student_rows_adapter, students, next_cursor=next_cursor)
     except Exception as e:
         return await handle_exception(e)
 
@@ -49,6 +64,19 @@ async def add_student(student_data: StudentSchema, db: AsyncSession = Depends(ge
     except Exception as e:
         return await handle_exception(e)
 
+@router.post("/upsert", dependencies=[RoleGuard(["admin"])])
+async def upsert_students(
+    students_data: list[StudentSchema],
+    chunk_size: int = Query(500, ge=1, le=MAX_UPSERT_CHUNK_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        student_service = StudentService(db)
+        summary = await student_service.upsert_students(students_data, chunk_size)
+        return JSONResponse(content={"message": "Students upserted", "data": summary}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
 @router.delete("/remove/{student_id}", dependencies=[RoleGuard(["admin"])])
 async def remove_student(student_id: int, db: AsyncSession = Depends(get_db)):
     try:
@@ -81,7 +109,8 @@ async def update_student(student_id: int, student_data: StudentSchema, db: Async
         return await handle_exception(e)
     
 @router.get("/get_by_id/{student_id}", dependencies=[RoleGuard(ANYROLE)])
-async def get_student_by_id(student_id: int, db: AsyncSession = Depends(get_db)):
+@cached_response("student")
+async def get_student_by_id(student_id: int, db: AsyncSession = Depends(get_read_db)):
     try:
         student_service = StudentService(db)
         if student_id is None:
@@ -95,3 +124,25 @@ async def get_student_by_id(student_id: int, db: AsyncSession = Depends(get_db))
 
     except Exception as e:
         return await handle_exception(e)
+
+@router.get("/transcript/{student_id}", dependencies=[RoleGuard(ANYROLE)])
+@cached_response("student", "score", "subject")
+async def get_student_transcript(student_id: int, db: AsyncSession = Depends(get_read_db)):
+    try:
+        student_service = StudentService(db)
+        transcript = await student_service.get_student_transcript(student_id)
+        if transcript is None:
+            raise HTTPException(status_code=404, detail="Student not found")
+        return data_response(transcript_adapter, transcript)
+    except Exception as e:
+        return await handle_exception(e)
+
+@router.get("/transcripts", dependencies=[RoleGuard(ANYROLE)])
+@cached_response("student", "score", "subject")
+async def get_class_transcripts(class_: str, db: AsyncSession = Depends(get_read_db)):
+    try:
+        student_service = StudentService(db)
+        transcripts = await student_service.get_class_transcripts(class_)
+        return data_response(transcripts_adapter, transcripts)
+    except Exception as e:
+        return await handle_exception(e)
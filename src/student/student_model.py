@@ -1,8 +1,10 @@
-from sqlalchemy import Integer, String, Date
+from sqlalchemy import Integer, String, Date, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.database import Base
 class Student(Base):
     __tablename__ = "student" 
+    # Created by migration v004_student_class_index
+    __table_args__ = (Index("ix_student_class_student_id", "class_", "student_id"),)
 
     student_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
     name: Mapped[str] = mapped_column(String(255))
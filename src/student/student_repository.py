@@ -1,55 +1,179 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
-from student.student_schema import StudentSchema
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import select, insert, update, delete, bindparam
+from student.student_schema import StudentSchema, StudentRow, TranscriptRow
+from database.database_upsert import upsert_rows
+from cache.table_versions import table_versions
+from cache.versioned_cache import VersionedCache, MISSING, REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL
 from student.student_model import Student
+from subject.subject_model import Subject
+from score.score_model import Score
+from score.score_aggregate_repository import ScoreAggregateRepository
+from score.score_repository import ScoreRepository
+from score.score_archive_repository import ScoreArchiveRepository
+
+# Shared by every StudentRepository in this worker; invalidated on writes in any worker.
+student_cache = VersionedCache("student", REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL)
+
+# Read queries select these columns as plain rows: nothing goes through the
+# session's identity map. Only get_by_id, used by the write paths, loads entities.
+STUDENT_COLUMNS = (Student.student_id, Student.name, Student.birthdate, Student.class_)
+
+# Built once with bindparam placeholders so every call hits the compiled cache.
+STUDENTS_BY_ID = select(*STUDENT_COLUMNS).order_by(Student.student_id)
+STUDENT_PAGE_FIRST = STUDENTS_BY_ID.limit(bindparam("limit"))
+STUDENT_PAGE_AFTER = STUDENTS_BY_ID.filter(Student.student_id > bindparam("after")).limit(bindparam("limit"))
+STUDENT_ROW = select(*STUDENT_COLUMNS).filter(Student.student_id == bindparam("student_id"))
+STUDENT_BY_ID = select(Student).filter(Student.student_id == bindparam("student_id"))
+# Transcripts: the student, its scores and the subject names in one outer join.
+# A student without scores comes back as a single row with NULL score columns.
+TRANSCRIPT_SCORE_COLUMNS = ("subject_id", "subject_name", "score_id", "score", "date")
+_TRANSCRIPTS = (
+    select(
+        *STUDENT_COLUMNS,
+        Score.subject_id, Subject.name.label("subject_name"), Score.score_id, Score.score, Score.date,
+    )
+    .select_from(Student)
+    .outerjoin(Score, Score.student_id == Student.student_id)
+    .outerjoin(Subject, Subject.subject_id == Score.subject_id)
+    .order_by(Student.student_id, Score.subject_id, Score.date, Score.score_id)
+)
+STUDENT_TRANSCRIPT = _TRANSCRIPTS.filter(Student.student_id == bindparam("student_id"))
+CLASS_TRANSCRIPTS = _TRANSCRIPTS.filter(Student.class_ == bindparam("class_"))
+_student_table = Student.__table__
+INSERT_STUDENT = insert(_student_table)
+# The SET clause comes from the parameters; the key is bound as b_student_id.
+UPDATE_STUDENT = update(_student_table).where(_student_table.c.student_id == bindparam("b_student_id"))
+DELETE_STUDENT = delete(_student_table).where(_student_table.c.student_id == bindparam("student_id"))
+
+def group_transcripts(rows) -> list[TranscriptRow]:
+    """Folds the joined rows, ordered by student, into one transcript per student."""
+    transcripts = []
+    for row in rows:
+        if not transcripts or transcripts[-1]["student_id"] != row["student_id"]:
+            transcripts.append({column.key: row[column.key] for column in STUDENT_COLUMNS} | {"scores": []})
+        if row["score_id"] is not None:
+            transcripts[-1]["scores"].append({key: row[key] for key in TRANSCRIPT_SCORE_COLUMNS})
+    return transcripts
 
 class StudentRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_all(self):
-        result = await self.db.execute(select(Student))
-        return result.scalars().all()
+    async def get_all(self) -> list[StudentRow]:
+        result = await self.db.execute(select(*STUDENT_COLUMNS))
+        return [dict(row) for row in result.mappings()]
+
+    async def get_page(self, limit: int, after: int | None = None) -> list[StudentRow]:
+        if after is None:
+            result = await self.db.execute(STUDENT_PAGE_FIRST, {"limit": limit})
+        else:
+            result = await self.db.execute(STUDENT_PAGE_AFTER, {"limit": limit, "after": after})
+        return [dict(row) for row in result.mappings()]
+
+    async def stream_all(self, batch_size: int = 1000):
+        result = await self.db.stream(STUDENTS_BY_ID, execution_options={"yield_per": batch_size})
+        async for row in result.mappings():
+            yield dict(row)
 
     async def get_by_id(self, student_id: int):
-        result = await self.db.execute(
-            select(Student).filter(Student.student_id == student_id)
-        )
+        result = await self.db.execute(STUDENT_BY_ID, {"student_id": student_id})
         return result.scalar_one_or_none()
+
+    async def get_row(self, student_id: int) -> StudentRow | None:
+        result = await self.db.execute(STUDENT_ROW, {"student_id": student_id})
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_transcript(self, student_id: int) -> TranscriptRow | None:
+        result = await self.db.execute(STUDENT_TRANSCRIPT, {"student_id": student_id})
+        transcripts = group_transcripts(result.mappings())
+        return transcripts[0] if transcripts else None
+
+    async def get_class_transcripts(self, class_: str) -> list[TranscriptRow]:
+        result = await self.db.execute(CLASS_TRANSCRIPTS, {"class_": class_})
+        return group_transcripts(result.mappings())
+
+    async def get_cached(self, student_id: int) -> StudentSchema | None:
+        """Read-only snapshot of a student, served from student_cache. Use get_by_id
+        when the entity is going to be modified."""
+        student = student_cache.get(student_id)
+        if student is not MISSING:
+            return student
+        version = student_cache.version()
+        row = await self.get_row(student_id)
+        student = StudentSchema.model_validate(row) if row else None
+        # Unknown ids are cached too, so repeated lookups do not hit the database.
+        student_cache.set(student_id, student, version)
+        return student
+
+    async def exists(self, student_id: int) -> bool:
+        return await self.get_cached(student_id) is not None
+
+    async def get_cached_page(self, limit: int, after: int | None = None) -> list[StudentRow]:
+        key = ("page", limit, after)
+        students = student_cache.get(key)
+        if students is not MISSING:
+            return students
+        version = student_cache.version()
+        students = await self.get_page(limit, after)
+        student_cache.set(key, students, version)
+        return students
     
     async def add(self, student: StudentSchema):
+        # One INSERT; a duplicate id is reported by the primary key, not a prior SELECT.
         try:
-            student = Student(**student.model_dump())
-            self.db.add(student)
+            await self.db.execute(INSERT_STUDENT, student.model_dump())
             await self.db.commit()
-            await self.db.refresh(student)
-            return student
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Student already exists.")
         except SQLAlchemyError as e:
             await self.db.rollback()
             return None
+        student_cache.invalidate()
+        return student
 
-    async def delete(self, student: Student):
+    async def delete(self, student_id: int) -> bool:
         try:
-            await self.db.delete(student)
+            # The student's scores go with it, and the subject aggregates they
+            # contributed to have to be rebuilt. DELETE ... RETURNING hands back
+            # those subjects without loading the scores.
+            removed = await ScoreRepository(self.db).delete_returning("student_id", student_id)
+            await ScoreArchiveRepository(self.db).delete_by("student_id", student_id)
+            result = await self.db.execute(DELETE_STUDENT, {"student_id": student_id})
+            if result.rowcount == 0:
+                await self.db.rollback()
+                return False
+            subject_ids = {subject_id for _, subject_id, _ in removed}
+            await ScoreAggregateRepository(self.db).recompute_groups(student_ids=[student_id], subject_ids=subject_ids)
             await self.db.commit()
+            student_cache.invalidate()
+            table_versions.bump("score")
             return True
         except SQLAlchemyError as e:
             await self.db.rollback()
             return False
-            
 
     async def update(self, student_id: int, student_data: StudentSchema):
+        """Single UPDATE; returns None when no student has this id."""
         try:
-            student = await self.get_by_id(student_id)
-            if not student:
-                raise ValueError("Student not found.")
-            for key, value in student_data.model_dump().items():
-                setattr(student, key, value)
+            values = student_data.model_dump(exclude={"student_id"})
+            result = await self.db.execute(UPDATE_STUDENT, {"b_student_id": student_id, **values})
+            if result.rowcount == 0:
+                await self.db.rollback()
+                return None
             await self.db.commit()
-            await self.db.refresh(student)
-            return student
+            student_cache.invalidate()
+            return student_data.model_copy(update={"student_id": student_id})
         except SQLAlchemyError as e:
             await self.db.rollback()
             print(f"Error updating student: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    async def upsert_many(self, students: list[StudentSchema], chunk_size: int = 500):
+        rows = [student.model_dump() for student in students]
+        summary = await upsert_rows(self.db, Student, "student_id", rows, chunk_size)
+        if summary["inserted"] or summary["updated"]:
+            student_cache.invalidate()
+        return summary
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional
+from typing_extensions import TypedDict
 import datetime
 
 class StudentSchema(BaseModel):
@@ -8,4 +10,26 @@ class StudentSchema(BaseModel):
     class_: str
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class StudentRow(TypedDict):
+    student_id: int
+    name: str
+    birthdate: datetime.date
+    class_: str
+
+student_row_adapter = TypeAdapter(StudentRow)
+student_rows_adapter = TypeAdapter(list[StudentRow])
+
+class TranscriptScoreRow(TypedDict):
+    subject_id: int
+    subject_name: str
+    score_id: int
+    score: Optional[float]
+    date: Optional[datetime.date]
+
+class TranscriptRow(StudentRow):
+    scores: list[TranscriptScoreRow]
+
+transcript_adapter = TypeAdapter(TranscriptRow)
+transcripts_adapter = TypeAdapter(list[TranscriptRow])
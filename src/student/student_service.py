@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from student.student_repository import StudentRepository
 from student.student_model import Student
 from student.student_schema import StudentSchema
+from common.pagination import split_page
 
 class StudentService:
     def __init__(self, db: AsyncSession):
@@ -11,27 +12,34 @@ class StudentService:
         students = await self.repo.get_all()
         return students
 
+    async def get_students_page(self, limit: int, after: int | None = None):
+        students = await self.repo.get_cached_page(limit + 1, after)
+        return split_page(students, limit, "student_id")
+
+    def stream_all_students(self):
+        return self.repo.stream_all()
+
     async def add_student(self, student_data: StudentSchema):
-        is_existing_student = await self.repo.get_by_id(student_data.student_id)
-        if is_existing_student:
-            raise ValueError("Student already exists.")
         student = await self.repo.add(student_data)
         return student
 
     async def remove_student(self, student_id: int):
-        student = await self.repo.get_by_id(student_id)
-        if not student:
-            raise ValueError("Student not found.")
-        result = await self.repo.delete(student)
+        result = await self.repo.delete(student_id)
         return result
         
     async def update_student(self, student_id: int, student_data: StudentSchema):
-        student = await self.get_by_id(student_id)
-        if not student:
-            raise ValueError("Student not found.")
-        student = await self.repo.update(student, student_data)
+        student = await self.repo.update(student_id, student_data)
         return student
     
     async def get_student_by_id(self, student_id: int):
-        student = await self.repo.get_by_id(student_id)
-        return student
\ No newline at end of file
+        student = await self.repo.get_row(student_id)
+        return student
+
+    async def get_student_transcript(self, student_id: int):
+        return await self.repo.get_transcript(student_id)
+
+    async def get_class_transcripts(self, class_: str):
+        return await self.repo.get_class_transcripts(class_)
+
+    async def upsert_students(self, students: list[StudentSchema], chunk_size: int = 500):
+        return await self.repo.upsert_many(students, chunk_size)
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from subject.subject_service import SubjectService
-from subject.subject_schema import SubjectSchema
-from database.database import get_db
+from subject.subject_schema import SubjectSchema, subject_row_adapter, subject_rows_adapter
+from database.database import get_db, get_read_db
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import SQLAlchemyError
 from guard.guard_service import RoleGuard
+from cache.response_cache import cached_response
+from common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ndjson_response
+from common.serialization import data_response
+from metrics.metrics_registry import record_exception
 ANYROLE = ["admin", "user"]
+MAX_UPSERT_CHUNK_SIZE = 5000
 
 router = APIRouter(
     prefix="/api/subjects",
@@ -15,7 +20,8 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def handle_exception(e: Exception):
+async def handle_exception(e: Exception):
+    record_exception(router, e)
     if isinstance(e, HTTPException):
         return JSONResponse(content={"message": e.detail}, status_code=e.status_code)
     elif isinstance(e, SQLAlchemyError):
@@ -24,13 +30,22 @@ def handle_exception(e: Exception):
         return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
 
 @router.get("/list", dependencies=[RoleGuard(ANYROLE)])
-async def get_subjects(db: AsyncSession = Depends(get_db)):
+@cached_response("subject")
+async def get_subjects(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
+        if stream:
+            return ndjson_response(request, lambda session: SubjectService(session).stream_all_subjects(), subject_row_adapter)
         subject_service = SubjectService(db)
-        subjects = await subject_service.get_all_subjects()
+        subjects, next_cursor = await subject_service.get_subjects_page(limit, after)
         if subjects is None:
             raise HTTPException(status_code=404, detail="No subjects found")
-        return JSONResponse(content={"data": jsonable_encoder(subjects)}, status_code=200)
+        return data_response(subject_rows_adapter, subjects, next_cursor=next_cursor)
     except Exception as e:
         return await handle_exception(e)
 
@@ -46,6 +61,19 @@ async def add_subject(subject_data: SubjectSchema, db: AsyncSession = Depends(ge
     except Exception as e:
         return await handle_exception(e)
     
+@router.post("/upsert", dependencies=[RoleGuard(["admin"])])
+async def upsert_subjects(
+    subjects_data: list[SubjectSchema],
+    chunk_size: int = Query(500, ge=1, le=MAX_UPSERT_CHUNK_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        subject_service = SubjectService(db)
+        summary = await subject_service.upsert_subjects(subjects_data, chunk_size)
+        return JSONResponse(content={"message": "Subjects upserted", "data": summary}, status_code=200)
+    except Exception as e:
+        return await handle_exception(e)
+
 @router.delete("/remove/{subject_id}", dependencies=[RoleGuard(["admin"])])
 async def remove_subject(subject_id: int, db: AsyncSession = Depends(get_db)):
     try:
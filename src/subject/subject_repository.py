@@ -1,38 +1,120 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, bindparam
 from subject.subject_model import Subject
-from sqlalchemy.exc import SQLAlchemyError
-from subject.subject_schema import SubjectSchema
+from score.score_aggregate_repository import ScoreAggregateRepository
+from score.score_repository import ScoreRepository
+from score.score_archive_repository import ScoreArchiveRepository
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from subject.subject_schema import SubjectSchema, SubjectRow
+from database.database_upsert import upsert_rows
+from cache.table_versions import table_versions
+from cache.versioned_cache import VersionedCache, MISSING, REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL
+
+# Shared by every SubjectRepository in this worker; invalidated on writes in any worker.
+subject_cache = VersionedCache("subject", REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL)
+
+# Read queries select these columns as plain rows: nothing goes through the
+# session's identity map. Only get_by_id, used by the write paths, loads entities.
+SUBJECT_COLUMNS = (Subject.subject_id, Subject.name, Subject.amount)
+
+# Built once with bindparam placeholders so every call hits the compiled cache.
+SUBJECTS_BY_ID = select(*SUBJECT_COLUMNS).order_by(Subject.subject_id)
+SUBJECT_PAGE_FIRST = SUBJECTS_BY_ID.limit(bindparam("limit"))
+SUBJECT_PAGE_AFTER = SUBJECTS_BY_ID.filter(Subject.subject_id > bindparam("after")).limit(bindparam("limit"))
+SUBJECT_ROW = select(*SUBJECT_COLUMNS).filter(Subject.subject_id == bindparam("subject_id"))
+SUBJECT_BY_ID = select(Subject).filter(Subject.subject_id == bindparam("subject_id"))
+_subject_table = Subject.__table__
+INSERT_SUBJECT = insert(_subject_table)
+# The SET clause comes from the parameters; the key is bound as b_subject_id.
+UPDATE_SUBJECT = update(_subject_table).where(_subject_table.c.subject_id == bindparam("b_subject_id"))
+DELETE_SUBJECT = delete(_subject_table).where(_subject_table.c.subject_id == bindparam("subject_id"))
+
 class SubjectRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_all(self):
-        result = await self.db.execute(select(Subject))
-        return result.scalars().all()
+    async def get_all(self) -> list[SubjectRow]:
+        result = await self.db.execute(select(*SUBJECT_COLUMNS))
+        return [dict(row) for row in result.mappings()]
+
+    async def get_page(self, limit: int, after: int | None = None) -> list[SubjectRow]:
+        if after is None:
+            result = await self.db.execute(SUBJECT_PAGE_FIRST, {"limit": limit})
+        else:
+            result = await self.db.execute(SUBJECT_PAGE_AFTER, {"limit": limit, "after": after})
+        return [dict(row) for row in result.mappings()]
+
+    async def stream_all(self, batch_size: int = 1000):
+        result = await self.db.stream(SUBJECTS_BY_ID, execution_options={"yield_per": batch_size})
+        async for row in result.mappings():
+            yield dict(row)
 
     async def get_by_id(self, subject_id: int):
-        result = await self.db.execute(
-            select(Subject).filter(Subject.subject_id == subject_id)
-        )
+        result = await self.db.execute(SUBJECT_BY_ID, {"subject_id": subject_id})
         return result.scalar_one_or_none()
 
+    async def get_row(self, subject_id: int) -> SubjectRow | None:
+        result = await self.db.execute(SUBJECT_ROW, {"subject_id": subject_id})
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_cached(self, subject_id: int) -> SubjectSchema | None:
+        """Read-only snapshot of a subject, served from subject_cache. Use get_by_id
+        when the entity is going to be modified."""
+        subject = subject_cache.get(subject_id)
+        if subject is not MISSING:
+            return subject
+        version = subject_cache.version()
+        row = await self.get_row(subject_id)
+        subject = SubjectSchema.model_validate(row) if row else None
+        # Unknown ids are cached too, so repeated lookups do not hit the database.
+        subject_cache.set(subject_id, subject, version)
+        return subject
+
+    async def exists(self, subject_id: int) -> bool:
+        return await self.get_cached(subject_id) is not None
+
+    async def get_cached_page(self, limit: int, after: int | None = None) -> list[SubjectRow]:
+        key = ("page", limit, after)
+        subjects = subject_cache.get(key)
+        if subjects is not MISSING:
+            return subjects
+        version = subject_cache.version()
+        subjects = await self.get_page(limit, after)
+        subject_cache.set(key, subjects, version)
+        return subjects
+
     async def add(self, subject: SubjectSchema):
+        # One INSERT; a duplicate id or name is reported by the constraints, not a prior SELECT.
         try:
-            subject = Subject(**subject.model_dump())
-            self.db.add(subject)
+            await self.db.execute(INSERT_SUBJECT, subject.model_dump())
             await self.db.commit()
-            await self.db.refresh(subject)
-            return subject
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Subject already exists.")
         except SQLAlchemyError as e:
             await self.db.rollback()
             print(f"Error adding subject: {e}")
             return None
+        subject_cache.invalidate()
+        return subject
         
-    async def delete(self, subject: Subject):
+    async def delete(self, subject_id: int) -> bool:
         try:
-            await self.db.delete(subject)
+            # The subject's scores go with it, and the student aggregates they
+            # contributed to have to be rebuilt. DELETE ... RETURNING hands back
+            # those students without loading the scores.
+            removed = await ScoreRepository(self.db).delete_returning("subject_id", subject_id)
+            await ScoreArchiveRepository(self.db).delete_by("subject_id", subject_id)
+            result = await self.db.execute(DELETE_SUBJECT, {"subject_id": subject_id})
+            if result.rowcount == 0:
+                await self.db.rollback()
+                return False
+            student_ids = {student_id for student_id, _, _ in removed}
+            await ScoreAggregateRepository(self.db).recompute_groups(subject_ids=[subject_id], student_ids=student_ids)
             await self.db.commit()
+            subject_cache.invalidate()
+            table_versions.bump("score")
             return True
         except SQLAlchemyError as e:
             await self.db.rollback()
@@ -40,17 +122,27 @@ class SubjectRepository:
             return False
         
     async def update(self, subject_id: int, subject_data: SubjectSchema):
+        """Single UPDATE; returns None when no subject has this id."""
         try:
-            subject = await self.get_by_id(subject_id)
-            if not subject:
-                raise ValueError("Subject not found.")
-            for key, value in subject_data.model_dump().items():
-                setattr(subject, key, value)
+            values = subject_data.model_dump(exclude={"subject_id"})
+            result = await self.db.execute(UPDATE_SUBJECT, {"b_subject_id": subject_id, **values})
+            if result.rowcount == 0:
+                await self.db.rollback()
+                return None
             await self.db.commit()
-            await self.db.refresh(subject)
-            return subject
+            subject_cache.invalidate()
+            return subject_data.model_copy(update={"subject_id": subject_id})
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Subject name already exists.")
         except SQLAlchemyError as e:
             await self.db.rollback()
             print(f"Error updating subject: {e}")
             return None
-        
\ No newline at end of file
+
+    async def upsert_many(self, subjects: list[SubjectSchema], chunk_size: int = 500):
+        rows = [subject.model_dump() for subject in subjects]
+        summary = await upsert_rows(self.db, Subject, "subject_id", rows, chunk_size)
+        if summary["inserted"] or summary["updated"]:
+            subject_cache.invalidate()
+        return summary
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
 
 class SubjectSchema(BaseModel):
     subject_id: int
@@ -6,4 +7,12 @@ class SubjectSchema(BaseModel):
     amount: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SubjectRow(TypedDict):
+    subject_id: int
+    name: str
+    amount: int
+
+subject_row_adapter = TypeAdapter(SubjectRow)
+subject_rows_adapter = TypeAdapter(list[SubjectRow])
@@ -3,6 +3,7 @@ from subject.subject_model import Subject
 from subject.subject_repository import SubjectRepository
 from sqlalchemy.exc import SQLAlchemyError
 from subject.subject_schema import SubjectSchema
+from common.pagination import split_page
 
 class SubjectService:
     def __init__(self, db: AsyncSession):
@@ -12,24 +13,24 @@ class SubjectService:
         subjects = await self.repo.get_all()
         return subjects
 
+    async def get_subjects_page(self, limit: int, after: int | None = None):
+        subjects = await self.repo.get_cached_page(limit + 1, after)
+        return split_page(subjects, limit, "subject_id")
+
+    def stream_all_subjects(self):
+        return self.repo.stream_all()
+
     async def add_subject(self, subject_data: SubjectSchema):
-        is_existing_subject = await self.repo.get_by_id(subject_data.subject_id)
-        if is_existing_subject:
-            raise ValueError("Subject already exists.")
         subject = await self.repo.add(subject_data)
         return subject
 
     async def remove_subject(self, subject_id: int):
-        subject = await self.repo.get_by_id(subject_id)
-        if not subject:
-            raise ValueError("Subject not found.")
-        result = await self.repo.delete(subject)
+        result = await self.repo.delete(subject_id)
         return result
 
     async def update(self, subject_id: int, subject_data: SubjectSchema):
-        subject = await self.get_by_id(subject_id)
-        if not subject:
-            raise ValueError("Subject not found.")
-        subject = await self.repo.update(subject, subject_data)
+        subject = await self.repo.update(subject_id, subject_data)
         return subject
-        
\ No newline at end of file
+
+    async def upsert_subjects(self, subjects: list[SubjectSchema], chunk_size: int = 500):
+        return await self.repo.upsert_many(subjects, chunk_size)
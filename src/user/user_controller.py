@@ -7,6 +7,9 @@ from user.user_service import UserService
 from user.user_schema import CreateUserReq, ChangePasswordRequest
 from database.database import get_db
 from guard.guard_service import RoleGuard, get_current_username
+from auth.password_hasher import PasswordHasherBusyError
+from auth.security_context import SecurityContext, get_security_context
+from metrics.metrics_registry import record_exception
 
 router = APIRouter(
     prefix="/api/users",
@@ -15,17 +18,24 @@ router = APIRouter(
 )
 
 async def handle_exception(e: Exception):
+    record_exception(router, e)
     if isinstance(e, HTTPException):
         return JSONResponse(content={"message": e.detail}, status_code=e.status_code)
+    elif isinstance(e, PasswordHasherBusyError):
+        return JSONResponse(content={"message": str(e)}, status_code=503, headers={"Retry-After": "1"})
     elif isinstance(e, SQLAlchemyError):
         return JSONResponse(content={"message": "Database error", "error": str(e)}, status_code=500)
     else:
         return JSONResponse(content={"message": "An unexpected error occurred", "error": str(e)}, status_code=500)
     
 @router.post("/register", dependencies=[RoleGuard(["admin"])])
-async def register_user(user_data: CreateUserReq, db: AsyncSession = Depends(get_db)):
+async def register_user(
+    user_data: CreateUserReq,
+    db: AsyncSession = Depends(get_db),
+    security: SecurityContext = Depends(get_security_context)
+):
     try:
-        user_service = UserService(db)
+        user_service = UserService(db, security)
         user = await user_service.create_user(user_data)
         if not user:
             raise HTTPException(status_code=500, detail="Failed to register user")
@@ -37,10 +47,11 @@ async def register_user(user_data: CreateUserReq, db: AsyncSession = Depends(get
 async def change_password(
     request: ChangePasswordRequest,
     current_user: Annotated[str, Depends(get_current_username)],
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    security: SecurityContext = Depends(get_security_context)
 ):
     try:
-        user_service = UserService(db)
+        user_service = UserService(db, security)
         if not request.new_password or not request.old_password:
             raise HTTPException(status_code=400, detail="New password and old password are required")
         user = await user_service.change_password(current_user, request)
@@ -1,15 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from user.user_model import User
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
+
+USER_BY_USERNAME = select(User).filter(User.username == bindparam("username"))
 
 class UserRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_user_by_username(self, username):
-        result = await self.db.execute(
-            select(User).filter(User.username == username)
-        )
+        result = await self.db.execute(USER_BY_USERNAME, {"username": username})
         return result.scalar_one_or_none()
 
     async def create_user(self, username: str, password: str, role: str = "user"):
@@ -17,7 +17,6 @@ class UserRepository:
             user = User(username=username, password=password, role=role)
             self.db.add(user)
             await self.db.commit()
-            await self.db.refresh(user)
             return user
         except Exception as e:
             await self.db.rollback()
@@ -28,7 +27,6 @@ class UserRepository:
         try:
             user.password = new_password
             await self.db.commit()
-            await self.db.refresh(user)
             return user
         except Exception as e:
             await self.db.rollback()
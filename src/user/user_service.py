@@ -1,17 +1,14 @@
 from user.user_schema import CreateUserReq, ChangePasswordRequest
-import os
-from passlib.context import CryptContext
 from user.user_repository import UserRepository
 from sqlalchemy.ext.asyncio import AsyncSession
 from auth.auth_service import AuthService
+from auth.security_context import SecurityContext
 
 class UserService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, security: SecurityContext):
         self.user_repository = UserRepository(db)
-        self.auth_service = AuthService(db)
-        self.secret_key = os.getenv("SECRET_KEY")
-        self.algorithm = os.getenv("ALGORITHM")
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.auth_service = AuthService(db, security)
+        self.password_hasher = security.password_hasher
         
     async def get_user_by_username(self, username):
         return await self.user_repository.get_user_by_username(username)
@@ -24,13 +21,13 @@ class UserService:
         if existing_user:
             raise ValueError("User already exists.")
         
-        hashed_password = self.pwd_context.hash(password)
+        hashed_password = await self.password_hasher.hash(password)
         user = await self.user_repository.create_user(username, hashed_password, role)
         return user
     
     async def change_password(self, username: str, data: ChangePasswordRequest):
         user = await self.auth_service.authenticate_user(username, data.old_password)
-        hashed_password = self.pwd_context.hash(data.new_password)
+        hashed_password = await self.password_hasher.hash(data.new_password)
         updated_user = await self.user_repository.change_password(user, hashed_password)
         return updated_user
 
@@ -0,0 +1,92 @@
+"""Shared setup: the app runs against two local SQLite files, a primary and a
+read replica. Nothing replicates between them; each test seeds both with the
+same rows, so a read shows which file served it once a test writes to one.
+
+The engines are created when the app modules are imported, so the settings
+are put in the environment here, before any test imports them.
+"""
+import datetime
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(WORK_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite+aiosqlite:///{os.path.join(WORK_DIR, 'replica.db')}"
+os.environ["CACHE_VERSION_FILE"] = os.path.join(WORK_DIR, "cache_versions")
+os.environ["REPORT_DIR"] = os.path.join(WORK_DIR, "reports")
+os.environ["DB_AUTO_MIGRATE"] = "True"
+os.environ["SECRET_KEY"] = "test-secret-key-with-enough-length-for-hs256"
+os.environ["ALGORITHM"] = "HS256"
+os.environ.pop("METRICS_DIR", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+
+SCORE_DATES = (datetime.date(2024, 2, 1), datetime.date(2024, 3, 1), datetime.date(2024, 9, 1))
+
+async def seed(session_factory):
+    """Students 1-5 (class A or B) with three scores each, and student 50 and
+    subject 50 without any."""
+    from score.score_aggregate_repository import ScoreAggregateRepository
+    from score.score_aggregate_model import StudentScoreAggregate, SubjectScoreAggregate
+    from score.score_archive_model import ScoreArchive
+    from score.score_model import Score
+    from student.student_model import Student
+    from subject.subject_model import Subject
+
+    async with session_factory() as db:
+        for model in (Score, ScoreArchive, StudentScoreAggregate, SubjectScoreAggregate, Student, Subject):
+            await db.execute(delete(model))
+        await db.execute(insert(Student), [
+            {"student_id": i, "name": f"student {i}", "birthdate": datetime.date(2005, 1, 1), "class_": "A" if i % 2 else "B"}
+            for i in (1, 2, 3, 4, 5, 50)
+        ])
+        await db.execute(insert(Subject), [{"subject_id": i, "name": f"subject {i}", "amount": 3} for i in (1, 2, 3, 50)])
+        await db.execute(insert(Score), [
+            {"score_id": i * 10 + j, "student_id": i, "subject_id": j, "score": (i * j) % 10, "date": SCORE_DATES[j - 1]}
+            for i in range(1, 6) for j in range(1, 4)
+        ])
+        await ScoreAggregateRepository(db).rebuild()
+        await db.commit()
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+    from database.database import replica_engine
+    from database.database_migrations import run_migrations
+
+    with TestClient(app, base_url="http://test") as test_client:
+        test_client.portal.call(run_migrations, replica_engine)
+        yield test_client
+
+@pytest.fixture
+def seeded(client):
+    """Both databases reset to the seed rows, caches emptied, no pinning cookie."""
+    from cache.response_cache import response_cache
+    from cache.table_versions import table_versions
+    from database.database import AsyncSessionLocal, ReadSessionLocal
+    from student.student_repository import student_cache
+    from subject.subject_repository import subject_cache
+
+    for session_factory in (AsyncSessionLocal, ReadSessionLocal):
+        client.portal.call(seed, session_factory)
+    for table in ("student", "subject", "score"):
+        table_versions.bump(table)
+    response_cache.clear()
+    student_cache.invalidate()
+    subject_cache.invalidate()
+    client.cookies.clear()
+    return client
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    from auth.security_context import get_security_context
+
+    token = get_security_context().encode_token({
+        "sub": "test-admin", "role": "admin",
+        "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1),
+    })
+    return {"Authorization": f"Bearer {token}"}
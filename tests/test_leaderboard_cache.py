@@ -0,0 +1,105 @@
+import datetime
+from score.score_leaderboard_cache import GroupBoard, LeaderboardCache
+
+DATE = datetime.date(2024, 2, 1)
+
+def entry(score_id: int, score: float, student_id: int = 1, subject_id: int = 1) -> dict:
+    return {"score_id": score_id, "student_id": student_id, "subject_id": subject_id, "score": score, "date": DATE}
+
+def ranks(board: GroupBoard, k: int = 10) -> list[tuple]:
+    return [(row["rank"], row["score_id"]) for row in board.ranked(k)]
+
+def test_board_ranks_ties_together():
+    board = GroupBoard(3)
+    for score_id, score in ((1, 5.0), (2, 9.0), (3, 5.0), (4, 7.0)):
+        board.add(entry(score_id, score))
+    assert ranks(board) == [(1, 2), (2, 4), (3, 1), (3, 3)]
+    assert ranks(board, 2) == [(1, 2), (2, 4)]
+    assert board.complete
+
+def test_full_board_keeps_the_top_values():
+    board = GroupBoard(2)
+    for score_id, score in ((1, 5.0), (2, 9.0), (3, 7.0), (4, 1.0)):
+        board.add(entry(score_id, score))
+    assert ranks(board) == [(1, 2), (2, 3)]
+    assert not board.complete
+
+def test_remove_from_a_complete_board():
+    board = GroupBoard(3)
+    for score_id, score in ((1, 5.0), (2, 9.0), (3, 5.0)):
+        board.add(entry(score_id, score))
+    assert board.remove(1, 5.0)
+    assert ranks(board) == [(1, 2), (2, 3)]
+    assert board.remove(3, 5.0)
+    assert ranks(board) == [(1, 2)]
+    # A value the board does not hold changes nothing.
+    assert board.remove(8, 1.0)
+
+def test_remove_last_entry_of_an_incomplete_board_needs_a_reload():
+    board = GroupBoard(1)
+    board.add(entry(1, 9.0))
+    board.add(entry(2, 5.0))
+    assert not board.remove(1, 9.0)
+
+def loaded_cache(rows: list[dict], version: int = 5) -> LeaderboardCache:
+    cache = LeaderboardCache("subject", 3)
+    cache.groups = cache._build([{**row, "group": row["subject_id"]} for row in rows])
+    cache.versions = (version,)
+    return cache
+
+def test_apply_adds_and_removes_scores():
+    cache = loaded_cache([entry(1, 5.0), entry(2, 9.0, subject_id=2)])
+    cache.apply(5, 6, added=[entry(3, 7, subject_id=1), entry(4, 8, subject_id=3)], removed=[entry(2, 9.0, subject_id=2)])
+    assert cache.versions == (6,)
+    assert ranks(cache.groups[1]) == [(1, 3), (2, 1)]
+    assert ranks(cache.groups[2]) == []
+    assert ranks(cache.groups[3]) == [(1, 4)]
+    assert cache.groups[1].ranked(1)[0]["score"] == 7.0
+
+def test_apply_marks_a_group_stale_when_it_cannot_update_it():
+    cache = loaded_cache([entry(i, float(i)) for i in range(1, 5)])
+    assert not cache.groups[1].complete
+    cache.apply(5, 6, added=[], removed=[entry(4, 4.0)])
+    assert cache.groups[1] is None
+
+def test_apply_drops_the_board_after_a_missed_write():
+    cache = loaded_cache([entry(1, 5.0)])
+    cache.apply(6, 7, added=[entry(2, 9.0)], removed=[])
+    assert cache.groups is None
+
+async def cached_and_database_pages(session_factory, after=None, limit=20) -> tuple:
+    from sqlalchemy import update
+    from common.pagination import split_page
+    from score.score_leaderboard_repository import ScoreLeaderboardRepository, group_entries
+    from student.student_model import Student
+
+    async with session_factory() as db:
+        await db.execute(update(Student).where(Student.student_id.in_([1, 2])).values(class_=None))
+        await db.commit()
+        repo = ScoreLeaderboardRepository(db)
+        cache = LeaderboardCache("class", 3)
+        cached = await cache.get_page(repo, 3, limit=limit, after=after)
+        rows = await repo.get_top("class", 3, after=after, limit=limit + 1)
+        return cached, split_page(group_entries(rows), limit, "group")
+
+def test_students_without_a_class_match_the_database_path(seeded):
+    from database.database import AsyncSessionLocal
+
+    cached, database = seeded.portal.call(cached_and_database_pages, AsyncSessionLocal)
+    assert [board["group"] for board in cached[0]] == ["A", "B"]
+    assert cached == database
+    cached, database = seeded.portal.call(cached_and_database_pages, AsyncSessionLocal, "A")
+    assert [board["group"] for board in cached[0]] == ["B"]
+    assert cached == database
+    # One group per page: the cursor must lead on to B.
+    cached, database = seeded.portal.call(cached_and_database_pages, AsyncSessionLocal, None, 1)
+    assert [board["group"] for board in cached[0]] == ["A"] and cached[1] == "A"
+    assert cached == database
+
+def test_apply_keeps_the_board_for_a_student_without_a_class():
+    cache = LeaderboardCache("class", 3)
+    cache.class_of = {1: None}
+    cache.groups = cache._build([{**entry(1, 5.0), "group": None}])
+    cache.versions = (5, cache._current_versions()[1])
+    cache.apply(5, 6, added=[entry(2, 7.0)], removed=[])
+    assert ranks(cache.groups[None]) == [(1, 2), (2, 1)]
@@ -0,0 +1,52 @@
+from cache.lru_cache import TTLLRUCache
+
+def byte_cache(max_bytes: int, max_size: int = 100) -> TTLLRUCache:
+    return TTLLRUCache(max_size, max_bytes=max_bytes, size_of=len)
+
+def test_evicts_least_recently_used_over_the_byte_budget():
+    cache = byte_cache(10)
+    cache.set("a", b"xxxx")
+    cache.set("b", b"xxxx")
+    cache.get("a")
+    cache.set("c", b"xxxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"xxxx" and cache.get("c") == b"xxxx"
+    assert cache.stats()["bytes"] == 8
+    assert cache.evictions == 1
+
+def test_replacing_a_value_counts_only_the_new_size():
+    cache = byte_cache(10)
+    cache.set("a", b"xxxxxx")
+    cache.set("a", b"xx")
+    cache.set("b", b"xxxxxx")
+    assert len(cache) == 2
+    assert cache.bytes == 8
+
+def test_value_over_the_budget_is_not_stored():
+    cache = byte_cache(10)
+    cache.set("a", b"xx")
+    cache.set("b", b"x" * 11)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"xx"
+
+def test_delete_expiry_and_clear_release_bytes():
+    cache = byte_cache(10)
+    cache.set("a", b"xx")
+    cache.set("b", b"xxx", expires_at=0)
+    cache.set("c", b"xxxx")
+    cache.delete("a")
+    assert cache.get("b") is None
+    assert cache.bytes == 4
+    cache.clear()
+    assert cache.bytes == 0
+
+def test_entry_limit_still_applies():
+    cache = byte_cache(100, max_size=2)
+    for key in "abc":
+        cache.set(key, b"x")
+    assert len(cache) == 2 and cache.bytes == 2
+
+def test_without_a_budget_sizes_are_not_tracked():
+    cache = TTLLRUCache(2)
+    cache.set("a", object())
+    assert "bytes" not in cache.stats()
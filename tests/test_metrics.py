@@ -0,0 +1,44 @@
+import subprocess
+import sys
+from metrics import metrics_middleware
+from metrics.metrics_registry import EXITED_SNAPSHOT, MetricsRegistry, http_requests
+from metrics.metrics_store import request_metrics
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def worker(directory: str, requests: float, pid: int | None = None) -> MetricsRegistry:
+    """A registry for this process, or a flushed snapshot of worker `pid`."""
+    registry = MetricsRegistry(directory)
+    registry.counter("requests", "Requests.").inc(amount=requests)
+    registry.histogram("latency", "Latency.", (0.1, 1.0)).observe(0.5)
+    registry.collector("connections", "gauge", "Connections.", (), lambda: [((), 3)])
+    if pid is not None:
+        registry.snapshot_name = f"{pid}-1.json"
+        registry.flush()
+    return registry
+
+def test_exited_workers_are_folded_into_one_snapshot(tmp_path):
+    worker(str(tmp_path), 2, pid=dead_pid())
+    worker(str(tmp_path), 3, pid=dead_pid())
+    live = worker(str(tmp_path), 5)
+    text = live.render()
+    assert [path.name for path in tmp_path.glob("*.json")] == [EXITED_SNAPSHOT]
+    assert "requests_total 10.0" in text
+    assert 'latency_bucket{le="1.0"} 3' in text
+    # Only the live worker reports the gauge.
+    assert text.count("connections{") == 1
+    # A second fold finds nothing to add; the totals stay put.
+    assert live.render() == text
+
+def test_http_series_are_recorded_without_request_metrics(seeded, admin_headers, monkeypatch):
+    monkeypatch.setattr(metrics_middleware, "REQUEST_METRICS", False)
+    request_metrics.clear()
+    before = http_requests.values.get(("students", "GET", "200"), 0.0)
+    response = seeded.get("/api/students/list", headers=admin_headers)
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert http_requests.values[("students", "GET", "200")] == before + 1
+    assert request_metrics.stats() == []
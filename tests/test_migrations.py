@@ -0,0 +1,49 @@
+"""Schema migrations on a fresh SQLite file."""
+import asyncio
+import datetime
+from sqlalchemy import inspect, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from database.database_migrations import discover_migrations, run_migrations
+from score.score_archive_model import ScoreArchive
+from score.score_model import Score
+
+SCORE = {"student_id": 1, "subject_id": 1, "score": 5.0, "date": datetime.date(2024, 2, 1)}
+
+async def migrate_and_insert(url: str, upgrade_from: int | None = None) -> tuple[list, list]:
+    """Migrate (optionally stopping before upgrade_from to add an archived and
+    a live score first), then insert a score without score_id. Returns the
+    primary key columns and the score ids."""
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        if upgrade_from is None:
+            await run_migrations(engine)
+        else:
+            for version, _, module in discover_migrations():
+                if version < upgrade_from:
+                    await conn.run_sync(module.upgrade)
+            await conn.execute(text("INSERT INTO student (student_id, name) VALUES (1, 'a')"))
+            await conn.execute(text("INSERT INTO subject (subject_id, name, amount) VALUES (1, 'b', 1)"))
+            await conn.execute(insert(Score), [{**SCORE, "score_id": 3}])
+            await conn.execute(insert(ScoreArchive), [{**SCORE, "score_id": 7, "term": "2024-1", "archived_at": datetime.datetime(2025, 1, 1)}])
+    if upgrade_from is not None:
+        await run_migrations(engine)
+    async with engine.begin() as conn:
+        if upgrade_from is None:
+            await conn.execute(text("INSERT INTO student (student_id, name) VALUES (1, 'a')"))
+            await conn.execute(text("INSERT INTO subject (subject_id, name, amount) VALUES (1, 'b', 1)"))
+        await conn.execute(insert(Score), [SCORE])
+        primary_key = await conn.run_sync(lambda sync: inspect(sync).get_pk_constraint("score")["constrained_columns"])
+        score_ids = list((await conn.execute(select(Score.score_id).order_by(Score.score_id))).scalars())
+    await engine.dispose()
+    return primary_key, score_ids
+
+def test_sqlite_assigns_score_ids(tmp_path):
+    primary_key, score_ids = asyncio.run(migrate_and_insert(f"sqlite+aiosqlite:///{tmp_path / 'fresh.db'}"))
+    assert primary_key == ["score_id"]
+    assert score_ids == [1]
+
+def test_sqlite_score_table_is_rebuilt_past_archived_ids(tmp_path):
+    primary_key, score_ids = asyncio.run(migrate_and_insert(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}", upgrade_from=6))
+    assert primary_key == ["score_id"]
+    # 7 is archived, so the next id is 8 rather than 4.
+    assert score_ids == [3, 8]
@@ -0,0 +1,62 @@
+"""SQL statements issued per endpoint, checked against the expected round trips.
+
+Every request runs against freshly seeded databases with the reference and
+response caches cleared, so the counts are the cold-cache worst case.
+"""
+import pytest
+from sqlalchemy import event
+from database.database import AsyncSessionLocal, engine, replica_engine
+from score.score_aggregate_repository import ScoreAggregateRepository
+
+# (method, path, json body, expected status, expected statements)
+ENDPOINTS = [
+    ("GET", "/api/scores/list?limit=10", None, 200, 1),
+    ("GET", "/api/scores/student/1/true", None, 200, 1),
+    ("GET", "/api/scores/avg/1", None, 200, 1),
+    ("GET", "/api/scores/top/5", None, 200, 1),
+    ("GET", "/api/scores/avg_all", None, 200, 1),
+    # INSERT ... SELECT with the reference checks, then the two aggregate upserts.
+    ("POST", "/api/scores/add", {"score_id": 100, "student_id": 1, "subject_id": 2, "score": 7, "date": "2024-05-01"}, 201, 3),
+    # Reads the old row for the aggregates: SELECT, UPDATE, two decrements, two upserts.
+    ("PUT", "/api/scores/update/11", {"score": 9}, 200, 6),
+    # DELETE ... RETURNING, then the two aggregate decrements.
+    ("DELETE", "/api/scores/remove/11", None, 200, 3),
+    ("DELETE", "/api/scores/remove/999", None, 404, 1),
+    ("GET", "/api/students/list", None, 200, 1),
+    ("GET", "/api/students/get_by_id/1", None, 200, 1),
+    ("GET", "/api/students/transcript/1", None, 200, 1),
+    ("GET", "/api/students/transcripts?class_=A", None, 200, 1),
+    ("POST", "/api/students/add", {"student_id": 60, "name": "new", "birthdate": "2006-01-01", "class_": "C"}, 201, 1),
+    ("PUT", "/api/students/update/50", {"student_id": 50, "name": "renamed", "birthdate": "2006-01-01", "class_": "C"}, 200, 1),
+    # Scores (RETURNING), archived scores, the student, then delete + rebuild of the student aggregate.
+    ("DELETE", "/api/students/remove/50", None, 200, 5),
+    ("GET", "/api/subjects/list", None, 200, 1),
+    ("POST", "/api/subjects/add", {"subject_id": 60, "name": "new subject", "amount": 2}, 201, 1),
+    ("PUT", "/api/subjects/update/50", {"subject_id": 50, "name": "renamed subject", "amount": 3}, 200, 1),
+    ("DELETE", "/api/subjects/remove/50", None, 200, 5),
+]
+
+@pytest.fixture
+def statements(seeded):
+    issued = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    engines = [engine.sync_engine, replica_engine.sync_engine]
+    for db_engine in engines:
+        event.listen(db_engine, "before_cursor_execute", count_statement)
+    yield issued
+    for db_engine in engines:
+        event.remove(db_engine, "before_cursor_execute", count_statement)
+
+async def aggregate_mismatches():
+    async with AsyncSessionLocal() as db:
+        return await ScoreAggregateRepository(db).check()
+
+@pytest.mark.parametrize(("method", "path", "body", "status", "expected"), ENDPOINTS, ids=[f"{m} {p}" for m, p, *_ in ENDPOINTS])
+def test_statements_per_request(seeded, admin_headers, statements, method, path, body, status, expected):
+    response = seeded.request(method, path, json=body, headers=admin_headers)
+    assert response.status_code == status
+    assert len(statements) == expected, "\n".join(" ".join(statement.split())[:150] for statement in statements)
+    assert seeded.portal.call(aggregate_mismatches) == []
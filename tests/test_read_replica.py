@@ -0,0 +1,40 @@
+"""Read routing between the primary and the replica (two SQLite files)."""
+import json
+from database.database_routing import ReadYourWritesMiddleware
+from database.database import READ_PRIMARY_COOKIE
+
+NEW_STUDENT = {"student_id": 60, "name": "new", "birthdate": "2006-01-01", "class_": "C"}
+
+def student_ids(response) -> set:
+    return {student["student_id"] for student in response.json()["data"]}
+
+def streamed_student_ids(response) -> set:
+    return {json.loads(line)["student_id"] for line in response.text.splitlines()}
+
+def test_reads_go_to_the_replica(seeded, admin_headers):
+    response = seeded.post("/api/students/add", json=NEW_STUDENT, headers=admin_headers)
+    assert response.status_code == 201
+    # A client that has not written reads the replica, which never saw the insert.
+    seeded.cookies.clear()
+    assert 60 not in student_ids(seeded.get("/api/students/list", headers=admin_headers))
+    assert 60 not in streamed_student_ids(seeded.get("/api/students/list?stream=true", headers=admin_headers))
+
+def test_write_pins_reads_to_the_primary(seeded, admin_headers):
+    response = seeded.post("/api/students/add", json=NEW_STUDENT, headers=admin_headers)
+    assert response.status_code == 201
+    assert READ_PRIMARY_COOKIE in response.cookies
+    assert 60 in student_ids(seeded.get("/api/students/list", headers=admin_headers))
+    assert 60 in streamed_student_ids(seeded.get("/api/students/list?stream=true", headers=admin_headers))
+
+def test_expired_cookie_reads_the_replica(seeded, admin_headers):
+    seeded.post("/api/students/add", json=NEW_STUDENT, headers=admin_headers)
+    seeded.cookies.set(READ_PRIMARY_COOKIE, "0")
+    assert 60 not in student_ids(seeded.get("/api/students/list", headers=admin_headers))
+
+def test_failed_write_does_not_pin(seeded, admin_headers):
+    response = seeded.post("/api/students/add", json={**NEW_STUDENT, "student_id": 1}, headers=admin_headers)
+    assert response.status_code >= 400
+    assert READ_PRIMARY_COOKIE not in response.cookies
+
+def test_middleware_is_enabled_with_a_replica():
+    assert ReadYourWritesMiddleware(app=None).enabled
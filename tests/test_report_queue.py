@@ -0,0 +1,56 @@
+from database.database import AsyncSessionLocal
+from report.report_queue import ReportQueue
+from report.report_schema import ReportRequest
+
+async def run_job(directory: str, cancel_from_another_worker: bool) -> dict:
+    queue = ReportQueue(directory, max_running=1, chunk_rows=2, session_factory=AsyncSessionLocal)
+    status = await queue.submit(ReportRequest(type="scores"))
+    if cancel_from_another_worker:
+        # What cancel() leaves behind for a job this worker does not own.
+        open(queue._path(status["id"], ".cancel"), "w").close()
+    await queue._tasks[status["id"]]
+    return queue.get(status["id"])
+
+def test_report_runs_to_completion(seeded, tmp_path):
+    status = seeded.portal.call(run_job, str(tmp_path), False)
+    assert status["state"] == "done"
+    assert status["rows_written"] == 15
+
+def test_cancel_marker_stops_the_job(seeded, tmp_path):
+    status = seeded.portal.call(run_job, str(tmp_path), True)
+    assert status["state"] == "cancelled"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [status["id"] + ".json"]
+
+async def cancel_during_write(directory: str, monkeypatch) -> tuple[dict, list]:
+    import asyncio
+    import threading
+    import time
+    from report import report_queue
+
+    started, errors = threading.Event(), []
+    write = report_queue.ReportWriter.write
+
+    def slow_write(self, rows):
+        started.set()
+        time.sleep(0.2)
+        try:
+            write(self, rows)
+        except Exception as e:
+            errors.append(e)
+
+    monkeypatch.setattr(report_queue.ReportWriter, "write", slow_write)
+    queue = ReportQueue(directory, max_running=1, chunk_rows=2, session_factory=AsyncSessionLocal)
+    status = await queue.submit(ReportRequest(type="scores"))
+    task = queue._tasks[status["id"]]
+    await asyncio.to_thread(started.wait)
+    queue.cancel(status)
+    await asyncio.gather(task, return_exceptions=True)
+    # Give an abandoned write time to hit the closed file.
+    await asyncio.sleep(0.3)
+    return queue.get(status["id"]), errors
+
+def test_cancel_lets_the_running_write_finish(seeded, tmp_path, monkeypatch):
+    status, errors = seeded.portal.call(cancel_during_write, str(tmp_path), monkeypatch)
+    assert status["state"] == "cancelled"
+    assert errors == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == [status["id"] + ".json"]
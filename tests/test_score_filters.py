@@ -0,0 +1,18 @@
+import pytest
+
+# The seeded scores of subject 1, 2 and 3 are dated 2024-02-01, 2024-03-01 and 2024-09-01.
+@pytest.mark.parametrize(("query", "count"), [
+    ("", 15),
+    ("&term=2024-1", 10),
+    ("&from=2024-03-01", 10),
+    ("&from=2024-03-01&term=2024-1", 5),
+    ("&to=2024-02-01&subject_id=2", 0),
+])
+def test_analytics_takes_the_score_date_filter(seeded, admin_headers, query, count):
+    response = seeded.get(f"/api/scores/analytics?group_by=none{query}", headers=admin_headers)
+    assert response.status_code == 200
+    groups = response.json()["data"]["groups"]
+    assert sum(group["count"] for group in groups) == count
+
+def test_analytics_rejects_an_unknown_term(seeded, admin_headers):
+    assert seeded.get("/api/scores/analytics?term=2024-3", headers=admin_headers).status_code == 422
@@ -0,0 +1,38 @@
+import datetime
+import re
+from score.score_term import TERM_PATTERN, date_bounds, is_closed, term_of, term_range
+
+# With the default TERM_START_MONTHS of 1,7.
+
+def test_term_range():
+    assert term_range("2024-1") == (datetime.date(2024, 1, 1), datetime.date(2024, 6, 30))
+    assert term_range("2024-2") == (datetime.date(2024, 7, 1), datetime.date(2024, 12, 31))
+
+def test_term_of_agrees_with_term_range():
+    for term in ("2023-2", "2024-1", "2024-2"):
+        start, end = term_range(term)
+        assert term_of(start) == term_of(end) == term
+        assert term_of(end + datetime.timedelta(days=1)) != term
+
+def test_is_closed():
+    assert is_closed("2024-1", today=datetime.date(2024, 7, 1))
+    assert not is_closed("2024-1", today=datetime.date(2024, 6, 30))
+
+def test_term_pattern():
+    assert re.match(TERM_PATTERN, "2024-2")
+    assert not re.match(TERM_PATTERN, "2024-3")
+    assert not re.match(TERM_PATTERN, "0000-1")
+
+def test_date_bounds_without_a_term():
+    assert date_bounds(None, None, None) == (None, None)
+    assert date_bounds(datetime.date(2024, 3, 1), None, None) == (datetime.date(2024, 3, 1), None)
+
+def test_date_bounds_intersects_the_term():
+    assert date_bounds(None, None, "2024-1") == (datetime.date(2024, 1, 1), datetime.date(2024, 6, 30))
+    assert date_bounds(datetime.date(2024, 3, 1), datetime.date(2025, 1, 1), "2024-1") == (
+        datetime.date(2024, 3, 1), datetime.date(2024, 6, 30),
+    )
+
+def test_date_bounds_outside_the_term_is_empty():
+    date_from, date_to = date_bounds(datetime.date(2024, 8, 1), None, "2024-1")
+    assert date_from > date_to